@@ -1,7 +1,183 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import ValidationError
 
-from .models import Category, Location, Post
+from . import deletion, moderation
+from .models import (
+    EDIT_DEFERRED_FIELDS,
+    Category,
+    Comment,
+    DeletionJob,
+    Follow,
+    Location,
+    Post,
+)
+from .paginators import AdminEstimatedCountPaginator
 
-admin.site.register(Category)
-admin.site.register(Location)
-admin.site.register(Post)
+User = get_user_model()
+
+
+class EstimatedCountAdmin(admin.ModelAdmin):
+    paginator = AdminEstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class PostActionForm(ActionForm):
+    category = forms.ModelChoiceField(
+        Category.objects.all(), required=False, label='Категория'
+    )
+
+
+@admin.register(Category)
+class CategoryAdmin(EstimatedCountAdmin):
+    list_display = ('title', 'slug', 'is_published', 'posts_count')
+    list_editable = ('is_published',)
+    list_filter = ('is_published',)
+    search_fields = ('title',)
+    prepopulated_fields = {'slug': ('title',)}
+
+
+@admin.register(Location)
+class LocationAdmin(EstimatedCountAdmin):
+    list_display = ('name', 'is_published', 'created_at')
+    list_editable = ('is_published',)
+    list_filter = ('is_published',)
+    search_fields = ('name',)
+
+
+@admin.register(Post)
+class PostAdmin(EstimatedCountAdmin):
+    list_display = (
+        'title', 'author', 'category', 'location', 'is_published', 'pub_date',
+    )
+    list_select_related = ('author', 'category', 'location')
+    list_filter = ('is_published', 'category')
+    date_hierarchy = 'pub_date'
+    search_fields = ('title',)
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('category', 'location')
+    action_form = PostActionForm
+    actions = ('publish', 'unpublish', 'recategorize', 'delete_in_batches')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(*EDIT_DEFERRED_FIELDS)
+
+    @admin.action(description='Опубликовать выбранные публикации')
+    def publish(self, request, queryset):
+        updated = moderation.update_posts(queryset, is_published=True)
+        self.message_user(request, f'Опубликовано публикаций: {updated}.')
+
+    @admin.action(description='Снять с публикации выбранные публикации')
+    def unpublish(self, request, queryset):
+        updated = moderation.update_posts(queryset, is_published=False)
+        self.message_user(request, f'Снято с публикации: {updated}.')
+
+    @admin.action(description='Перенести выбранные публикации в категорию')
+    def recategorize(self, request, queryset):
+        try:
+            category = self.action_form.base_fields['category'].clean(
+                request.POST.get('category')
+            )
+        except ValidationError:
+            category = None
+        if category is None:
+            self.message_user(
+                request, 'Выберите категорию для переноса.', messages.WARNING
+            )
+            return
+        updated = moderation.update_posts(queryset, category=category)
+        self.message_user(
+            request, f'Перенесено в «{category}» публикаций: {updated}.'
+        )
+
+    @admin.action(
+        description='Удалить выбранные публикации с комментариями пачками'
+    )
+    def delete_in_batches(self, request, queryset):
+        deleted = moderation.delete_posts(queryset)
+        self.message_user(request, f'Удалено публикаций: {deleted}.')
+
+
+@admin.register(Comment)
+class CommentAdmin(EstimatedCountAdmin):
+    list_display = ('__str__', 'post', 'is_published', 'created_at')
+    list_select_related = ('author', 'post')
+    list_filter = ('is_published',)
+    date_hierarchy = 'created_at'
+    search_fields = ('text',)
+    raw_id_fields = ('post', 'author')
+    actions = ('publish', 'unpublish', 'delete_in_batches')
+
+    def delete_model(self, request, obj):
+        moderation.delete_comments(Comment.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        moderation.delete_comments(queryset)
+
+    @admin.action(description='Опубликовать выбранные комментарии')
+    def publish(self, request, queryset):
+        updated = moderation.update_comments(queryset, is_published=True)
+        self.message_user(request, f'Опубликовано комментариев: {updated}.')
+
+    @admin.action(description='Снять с публикации выбранные комментарии')
+    def unpublish(self, request, queryset):
+        updated = moderation.update_comments(queryset, is_published=False)
+        self.message_user(request, f'Снято с публикации: {updated}.')
+
+    @admin.action(description='Удалить выбранные комментарии пачками')
+    def delete_in_batches(self, request, queryset):
+        deleted = moderation.delete_comments(queryset)
+        self.message_user(request, f'Удалено комментариев: {deleted}.')
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__', 'comments_deleted', 'posts_deleted', 'created_at',
+        'updated_at', 'finished_at',
+    )
+    list_filter = ('kind',)
+    readonly_fields = (
+        'kind', 'object_id', 'comments_deleted', 'posts_deleted',
+        'created_at', 'updated_at', 'finished_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Follow)
+class FollowAdmin(EstimatedCountAdmin):
+    list_display = ('follower', 'author', 'category', 'created_at')
+    list_select_related = ('follower', 'author', 'category')
+    raw_id_fields = ('follower', 'author')
+    autocomplete_fields = ('category',)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class BlogUserAdmin(UserAdmin):
+    actions = ('schedule_deletion',)
+
+    def delete_model(self, request, obj):
+        deletion.delete_user(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            deletion.delete_user(user)
+
+    @admin.action(description='Скрыть и удалить в фоне со всеми записями')
+    def schedule_deletion(self, request, queryset):
+        for user in queryset:
+            deletion.schedule_user_deletion(user)
+        self.message_user(
+            request,
+            f'Поставлено в очередь удаления: {len(queryset)}. '
+            'Удаление выполняет manage.py process_deletions.',
+        )
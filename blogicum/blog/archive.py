@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .caching import published_category_ids
+from .models import ArchiveMonth
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_start(month):
+    return timezone.make_aware(datetime(month.year, month.month, month.day))
+
+
+def archive_months(posts, category_id=None):
+    # (month, posts) pairs, newest first. Past months come from the
+    # maintained buckets; the current month's bucket also holds posts
+    # scheduled for later this month, so it is counted over the pub_date
+    # index from the visible `posts` instead.
+    current = timezone.localdate().replace(day=1)
+    buckets = ArchiveMonth.objects.filter(
+        month__lt=current,
+        posts_count__gt=0,
+        category_id__in=published_category_ids(),
+    )
+    if category_id is not None:
+        buckets = buckets.filter(category_id=category_id)
+    months = list(buckets.values('month').annotate(
+        total=Sum('posts_count')
+    ).order_by('-month').values_list('month', 'total'))
+    current_count = posts.filter(pub_date__gte=month_start(current)).count()
+    if current_count:
+        months.insert(0, (current, current_count))
+    return months
+
+
+def archive_years(months):
+    years = {}
+    for month, total in months:
+        years[month.year] = years.get(month.year, 0) + total
+    return sorted(years.items(), reverse=True)
+
+
+def archive_range(year, month=None):
+    # [start, end) of a year or of one of its months, as dates. Raises
+    # ValueError for a month outside 1-12, month 0 included.
+    if month is None:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    start = date(year, month, 1)
+    return start, next_month(start)
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_CACHE_KEY = 'blog:user:{}'
+
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+def get_user_cache():
+    # Only a cache shared by all workers sees the deletes of the others.
+    if settings.USER_CACHE is None:
+        return None
+    return caches[settings.USER_CACHE]
+
+
+def forget_cached_user(user_id):
+    cache = get_user_cache()
+    if cache is not None:
+        cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    # Session authentication looks the user up on every request; keep the
+    # row in the cache until the user is saved, deleted or logs out.
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        if cache is None:
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Category, Location
+
+LOCATIONS_GENERATION_KEY = 'blog:locations:generation'
+
+_categories_lock = threading.Lock()
+_categories = {
+    'expires': 0.0, 'by_slug': None, 'by_id': None, 'ordered': None,
+}
+
+
+def _load_published_categories():
+    now = time.monotonic()
+    with _categories_lock:
+        if _categories['by_slug'] is None or now >= _categories['expires']:
+            categories = list(
+                Category.objects.filter(is_published=True).order_by('title')
+            )
+            _categories['ordered'] = categories
+            _categories['by_slug'] = {
+                category.slug: category for category in categories
+            }
+            _categories['by_id'] = {
+                category.id: category for category in categories
+            }
+            _categories['expires'] = now + settings.CATEGORY_CACHE_TIMEOUT
+        return _categories
+
+
+def get_published_category(slug):
+    return _load_published_categories()['by_slug'].get(slug)
+
+
+def published_category_ids():
+    return list(_load_published_categories()['by_id'])
+
+
+def published_categories():
+    return _load_published_categories()['ordered']
+
+
+def attach_published_categories(posts):
+    # Feeds select only posts of published categories, so their category
+    # rows come from this cache instead of a join.
+    by_id = _load_published_categories()['by_id']
+    posts = list(posts)
+    for post in posts:
+        post.category = by_id.get(post.category_id)
+    return posts
+
+
+def forget_published_categories():
+    with _categories_lock:
+        _categories['by_slug'] = _categories['by_id'] = None
+        _categories['ordered'] = None
+
+
+def search_published_locations(term, limit):
+    # Autocomplete results are shared between processes and dropped as a
+    # whole on any location change.
+    generation = cache.get_or_set(LOCATIONS_GENERATION_KEY, 1, None)
+    key = 'blog:locations:{}:{}:{}'.format(
+        generation, limit, hashlib.md5(term.casefold().encode()).hexdigest()
+    )
+    results = cache.get(key)
+    if results is None:
+        results = [
+            {'id': location_id, 'name': name}
+            for location_id, name in Location.objects.filter(
+                is_published=True, name__icontains=term
+            ).order_by('name').values_list('id', 'name')[:limit]
+        ]
+        cache.set(key, results, settings.LOCATION_SEARCH_CACHE_TIMEOUT)
+    return results
+
+
+def forget_published_locations():
+    try:
+        cache.incr(LOCATIONS_GENERATION_KEY)
+    except ValueError:
+        cache.set(LOCATIONS_GENERATION_KEY, 1, None)
+
+
+def seconds_until_next_post(posts, timeout):
+    # A scheduled post has to appear as soon as its pub_date passes, so a
+    # cached rendering never outlives the next pub_date in it.
+    next_pub_date = posts.filter(
+        pub_date__gt=timezone.now(), is_published=True
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+    if next_pub_date is None:
+        return timeout
+    return max(1, min(
+        timeout, int((next_pub_date - timezone.now()).total_seconds()) + 1
+    ))
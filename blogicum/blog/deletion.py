@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from . import moderation
+from .models import Comment, DeletionJob, Post
+
+User = get_user_model()
+
+
+def schedule_post_deletion(post):
+    # A post with a handful of comments is deleted at once; a larger one is
+    # hidden and left to `manage.py process_deletions`.
+    limit = settings.DELETION_BATCH_SIZE
+    if Comment.objects.filter(post_id=post.pk)[:limit + 1].count() <= limit:
+        post.delete()
+        return None
+    moderation.update_posts(
+        Post.objects.filter(pk=post.pk),
+        is_published=False,
+        pending_deletion=True,
+    )
+    return DeletionJob.objects.get_or_create(
+        kind=DeletionJob.POST, object_id=post.pk
+    )[0]
+
+
+def schedule_user_deletion(user):
+    user.is_active = False
+    user.save(update_fields=['is_active'])
+    moderation.update_posts(
+        Post.objects.filter(author_id=user.pk, is_published=True),
+        is_published=False,
+    )
+    moderation.update_comments(
+        Comment.objects.filter(author_id=user.pk, is_published=True),
+        is_published=False,
+    )
+    return DeletionJob.objects.get_or_create(
+        kind=DeletionJob.USER, object_id=user.pk
+    )[0]
+
+
+def delete_user(user):
+    # The posts and comments go first with set-based deletes and recounts,
+    # so the cascade from the user row has no per-row post signals to run.
+    with transaction.atomic():
+        moderation.delete_comments(Comment.objects.filter(author_id=user.pk))
+        moderation.delete_posts(Post.objects.filter(author_id=user.pk))
+        user.delete()
+
+
+def job_steps(job):
+    if job.kind == DeletionJob.USER:
+        yield (
+            'comments_deleted',
+            moderation.delete_comments,
+            Comment.objects.filter(author_id=job.object_id),
+        )
+        posts = Post.objects.filter(author_id=job.object_id)
+    else:
+        posts = Post.objects.filter(pk=job.object_id)
+    yield (
+        'comments_deleted',
+        moderation.delete_comments,
+        Comment.objects.filter(post__in=posts),
+    )
+    yield 'posts_deleted', moderation.delete_posts, posts
+
+
+def run_job(job, batch_size=None, max_batches=None, progress=None):
+    # Every batch commits together with the job's counters, so a job that
+    # was interrupted simply continues with whatever rows are left.
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    batches = 0
+    for counter, delete, queryset in job_steps(job):
+        for ids in moderation.in_chunks(queryset, batch_size):
+            if max_batches is not None and batches >= max_batches:
+                return False
+            with transaction.atomic():
+                deleted = delete(queryset.filter(pk__in=ids), batch_size)
+                setattr(job, counter, getattr(job, counter) + deleted)
+                job.save(update_fields=[counter, 'updated_at'])
+            batches += 1
+            if progress is not None:
+                progress(job)
+    if job.kind == DeletionJob.USER:
+        User.objects.filter(pk=job.object_id).delete()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['finished_at', 'updated_at'])
+    if progress is not None:
+        progress(job)
+    return True
+
+
+def pending_jobs():
+    return DeletionJob.objects.filter(finished_at__isnull=True)
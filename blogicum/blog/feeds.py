@@ -0,0 +1,261 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, quote_etag
+
+from .caching import (
+    attach_published_categories,
+    get_published_category,
+    seconds_until_next_post,
+)
+from . import publishing
+from .models import Category, Post
+from .prerender import anonymous_request
+from .publishing import AtomicFile
+from .visibility import get_queryset
+
+FEED_ITEMS = 20
+FEED_TYPES = {'rss': Rss201rev2Feed, 'atom': Atom1Feed}
+GENERATION_FILENAME = 'generation'
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class PostsFeed(Feed):
+    def __init__(self, feed_format):
+        super().__init__()
+        self.feed_type = FEED_TYPES[feed_format]
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        self.cache_timeout = seconds_until_next_post(
+            self.get_posts(obj), settings.FEED_CACHE_TIMEOUT
+        )
+        posts = attach_published_categories(
+            get_queryset(self.get_posts(obj)).order_by('-pub_date')[
+                :FEED_ITEMS
+            ]
+        )
+        self.last_modified = int(posts[0].pub_date.timestamp()) if (
+            posts
+        ) else None
+        return posts
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=[item.id])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.category.title] if item.category else []
+
+
+class LatestPostsFeed(PostsFeed):
+    url_name = 'blog:feed'
+    title = 'Блогикум'
+    description = 'Новые публикации Блогикума'
+
+    def link(self):
+        return reverse('blog:index')
+
+
+class CategoryPostsFeed(PostsFeed):
+    url_name = 'blog:category_feed'
+
+    def get_object(self, request, category_slug):
+        category = get_published_category(category_slug)
+        if category is None:
+            raise Http404
+        return category
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return Post.objects.filter(category_id=obj.id)
+
+
+class AuthorPostsFeed(PostsFeed):
+    url_name = 'blog:author_feed'
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Блогикум: публикации {obj.username}'
+
+    def description(self, obj):
+        return f'Новые публикации пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return Post.objects.filter(author_id=obj.id)
+
+
+def get_root():
+    return settings.FEED_ROOT
+
+
+def current_generation():
+    return publishing.read_generation(get_root() / GENERATION_FILENAME)
+
+
+def forget_rendered_feeds():
+    # The generation lives next to the rendered files, so one bump retires
+    # them for every worker; files of older generations are removed.
+    root = get_root()
+    if not root.is_dir():
+        return
+    generation = publishing.bump_generation(root / GENERATION_FILENAME)
+    for path in root.glob('*.json'):
+        if not path.name.startswith(f'{generation}-'):
+            path.unlink(missing_ok=True)
+
+
+def feed_path(generation, feed_class, feed_format, kwargs):
+    key = ':'.join([
+        feed_class.__name__, feed_format, *map(str, kwargs.values())
+    ])
+    return get_root() / '{}-{}.json'.format(
+        generation, hashlib.md5(key.encode()).hexdigest()
+    )
+
+
+def read_feed(feed_class, feed_format, kwargs):
+    path = feed_path(current_generation(), feed_class, feed_format, kwargs)
+    try:
+        with open(path, encoding='utf-8') as stored:
+            rendered = json.load(stored)
+    except (FileNotFoundError, ValueError):
+        return None
+    # Expired when the feed's next scheduled post is due (or after
+    # FEED_CACHE_TIMEOUT).
+    return rendered if rendered['expires'] > time.time() else None
+
+
+def render_feed(feed_class, feed_format, **kwargs):
+    # Rendered for the site address, so every worker stores the same file.
+    generation = current_generation()
+    feed = feed_class(feed_format)
+    response = feed(anonymous_request(reverse(
+        feed_class.url_name, kwargs={**kwargs, 'feed_format': feed_format}
+    )), **kwargs)
+    rendered = {
+        'content': response.content.decode(response.charset),
+        'content_type': response['Content-Type'],
+        'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+        'last_modified': feed.last_modified,
+        'expires': time.time() + feed.cache_timeout,
+    }
+    get_root().mkdir(parents=True, exist_ok=True)
+    with AtomicFile(
+        feed_path(generation, feed_class, feed_format, kwargs)
+    ) as output:
+        json.dump(rendered, output, ensure_ascii=False)
+    return rendered
+
+
+def post_feeds(states):
+    feeds = [(LatestPostsFeed, {})]
+    category_ids = {state['category_id'] for state in states if state}
+    author_ids = {state['author_id'] for state in states if state}
+    feeds += [
+        (CategoryPostsFeed, {'category_slug': slug})
+        for slug in Category.objects.filter(
+            pk__in=category_ids, is_published=True
+        ).values_list('slug', flat=True)
+    ]
+    feeds += [
+        (AuthorPostsFeed, {'username': username})
+        for username in User.objects.filter(
+            pk__in=author_ids
+        ).values_list('username', flat=True)
+    ]
+    return feeds
+
+
+def render_post_feeds(*states):
+    try:
+        for feed_class, kwargs in post_feeds(states):
+            for feed_format in FEED_TYPES:
+                render_feed(feed_class, feed_format, **kwargs)
+    except Exception:
+        # The write is committed; the feeds render on their next request.
+        logger.exception('Could not render feeds')
+
+
+def forget_post_feeds(*states):
+    # The feeds a changed post (old and new state) appears in are rendered
+    # again once the change is committed; the rest on their next request.
+    forget_rendered_feeds()
+    transaction.on_commit(lambda: render_post_feeds(*states))
+
+
+def serve_feed(request, feed_class, feed_format, **kwargs):
+    if feed_format not in FEED_TYPES:
+        raise Http404
+    rendered = read_feed(feed_class, feed_format, kwargs)
+    if rendered is None:
+        rendered = render_feed(feed_class, feed_format, **kwargs)
+    response = get_conditional_response(
+        request,
+        etag=rendered['etag'],
+        last_modified=rendered['last_modified'],
+    )
+    if response is None:
+        response = HttpResponse(
+            rendered['content'], content_type=rendered['content_type']
+        )
+    response['ETag'] = rendered['etag']
+    if rendered['last_modified'] is not None:
+        response['Last-Modified'] = http_date(rendered['last_modified'])
+    return response
+
+
+def latest_posts(request, feed_format):
+    return serve_feed(request, LatestPostsFeed, feed_format)
+
+
+def category_posts(request, category_slug, feed_format):
+    return serve_feed(
+        request, CategoryPostsFeed, feed_format, category_slug=category_slug
+    )
+
+
+def author_posts(request, username, feed_format):
+    return serve_feed(
+        request, AuthorPostsFeed, feed_format, username=username
+    )
@@ -1,6 +1,40 @@
 from django import forms
+from django.db.models import Q
+from django.forms.models import ModelChoiceIterator
 
-from .models import Post, Comment
+from monitoring import metrics
+from .caching import published_categories, published_category_ids
+from .models import Comment, Post
+from .widgets import LocationAutocompleteWidget
+
+
+class TimedImageField(forms.ImageField):
+    def to_python(self, data):
+        with metrics.timer(
+            'blog_image_processing_seconds', operation='validate'
+        ):
+            return super().to_python(data)
+
+
+class PublishedCategoryIterator(ModelChoiceIterator):
+    def categories(self):
+        return [*self.field.unpublished_choices, *published_categories()]
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for category in self.categories():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(self.categories()) + (
+            self.field.empty_label is not None
+        )
+
+
+class PublishedCategoryField(forms.ModelChoiceField):
+    iterator = PublishedCategoryIterator
+    unpublished_choices = ()
 
 
 class PostForm(forms.ModelForm):
@@ -9,6 +43,31 @@ class PostForm(forms.ModelForm):
         fields = (
             'title', 'text', 'pub_date', 'location', 'category', 'image',
         )
+        field_classes = {
+            'image': TimedImageField,
+            'category': PublishedCategoryField,
+        }
+        widgets = {'location': LocationAutocompleteWidget}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # An edited post keeps its category and location after they have
+        # been unpublished, instead of failing validation on them.
+        for name in ('category', 'location'):
+            field = self.fields[name]
+            choices = Q(is_published=True)
+            current_id = getattr(self.instance, f'{name}_id')
+            if current_id is not None:
+                choices |= Q(pk=current_id)
+            field.queryset = field.queryset.filter(choices)
+        category_id = self.instance.category_id
+        if (
+                category_id is not None
+                and category_id not in published_category_ids()
+        ):
+            self.fields['category'].unpublished_choices = [
+                self.instance.category
+            ]
 
 
 class CommentForm(forms.ModelForm):
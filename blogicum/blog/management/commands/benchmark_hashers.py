@@ -0,0 +1,75 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers_by_algorithm
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку и пропускную способность хешеров паролей '
+        'из PASSWORD_HASHER_PROFILES на текущем оборудовании.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            'profiles', nargs='*',
+            help='Профили из PASSWORD_HASHER_PROFILES (по умолчанию все).'
+        )
+
+    def handle(self, *args, **options):
+        profiles = options['profiles'] or settings.PASSWORD_HASHER_PROFILES
+        self.stdout.write(
+            f'{"profile":<10} {"algorithm":<16} {"mean ms":>9} '
+            f'{"p95 ms":>9} {"logins/s":>9} '
+            f'{"x" + str(options["workers"]) + " /s":>9}'
+        )
+        for profile in profiles:
+            hasher = import_string(
+                settings.PASSWORD_HASHER_PROFILES[profile]
+            )()
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as error:
+                self.stderr.write(f'{profile}: {error}')
+                continue
+            latencies = self.measure(hasher, encoded, options['rounds'])
+            throughput = self.measure_throughput(
+                hasher, encoded, options['rounds'], options['workers']
+            )
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            mean = statistics.mean(latencies)
+            self.stdout.write(
+                f'{profile:<10} {hasher.algorithm:<16} {mean * 1000:>9.1f} '
+                f'{p95 * 1000:>9.1f} {1 / mean:>9.1f} {throughput:>9.1f}'
+            )
+        self.stdout.write(
+            f'Активный профиль: {settings.PASSWORD_HASHER_PROFILE} '
+            f'({get_hasher().algorithm}); известные алгоритмы: '
+            f'{", ".join(get_hashers_by_algorithm())}'
+        )
+
+    def measure(self, hasher, encoded, rounds):
+        latencies = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher.verify(PASSWORD, encoded)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def measure_throughput(self, hasher, encoded, rounds, workers):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(
+                lambda _: hasher.verify(PASSWORD, encoded),
+                range(rounds * workers),
+            ))
+        return rounds * workers / (time.perf_counter() - start)
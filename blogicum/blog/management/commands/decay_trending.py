@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.trending import decay_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает популярность публикаций с учётом прошедшего времени; '
+        'запускается раз в TRENDING["DECAY_INTERVAL"] секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--elapsed', type=float,
+            help='Секунд с прошлого запуска (по умолчанию DECAY_INTERVAL).',
+        )
+
+    def handle(self, *args, **options):
+        elapsed = options['elapsed'] or settings.TRENDING['DECAY_INTERVAL']
+        dropped = decay_scores(elapsed)
+        self.stdout.write(f'Удалено угасших оценок: {dropped}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Записывает sitemap-файлы публикаций (по SITEMAP_SHARD_SIZE адресов) '
+        'и категорий и индекс sitemap.xml в SITEMAP_ROOT. С --dirty '
+        'перестраивает только шарды, затронутые изменениями публикаций.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dirty',
+            action='store_true',
+            help='Перестроить только изменённые шарды.',
+        )
+
+    def handle(self, *args, **options):
+        if options['dirty']:
+            shards = sitemaps.regenerate_dirty()
+        else:
+            shards = sitemaps.generate_all()
+        self.stdout.write(
+            f'Обновлено шардов: {len(shards)} ({sitemaps.get_root()})'
+        )
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog import moderation
+from blog.models import Category
+
+ACTIONS = {
+    'posts': ('publish', 'unpublish', 'recategorize', 'delete'),
+    'comments': ('publish', 'unpublish', 'delete'),
+}
+FILTERS = ('author', 'category', 'since', 'until', 'text')
+
+
+def moment(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(value)
+        parsed = datetime.combine(date, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Публикует, снимает с публикации, переносит в другую категорию или '
+        'удаляет посты и комментарии по фильтрам пачками UPDATE/DELETE; '
+        'счётчики и кеши обновляются один раз на пачку.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=ACTIONS)
+        parser.add_argument('action', choices=ACTIONS['posts'])
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument('--category', help='Slug категории.')
+        parser.add_argument('--since', type=moment, help='Не раньше даты.')
+        parser.add_argument('--until', type=moment, help='Раньше даты.')
+        parser.add_argument(
+            '--text', help='Регулярное выражение по тексту (и заголовку).'
+        )
+        parser.add_argument(
+            '--to-category', help='Slug новой категории для recategorize.'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Разрешить действие без фильтров.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=moderation.CHUNK_SIZE
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать подходящие записи.',
+        )
+
+    def handle(self, *args, **options):
+        model, action = options['model'], options['action']
+        if action not in ACTIONS[model]:
+            raise CommandError(f'{action} недоступно для {model}.')
+        filters = {name: options[name] for name in FILTERS}
+        if not any(filters.values()) and not options['all']:
+            raise CommandError('Укажите фильтры или --all.')
+        if model == 'posts':
+            queryset = moderation.filter_posts(**filters)
+            update, delete = moderation.update_posts, moderation.delete_posts
+        else:
+            queryset = moderation.filter_comments(**filters)
+            update = moderation.update_comments
+            delete = moderation.delete_comments
+        if options['dry_run']:
+            self.stdout.write(f'Подходит записей: {queryset.count()}')
+            return
+        chunk_size = options['chunk_size']
+        if action == 'delete':
+            changed = delete(queryset, chunk_size)
+        elif action == 'recategorize':
+            category = Category.objects.filter(
+                slug=options['to_category']
+            ).first()
+            if category is None:
+                raise CommandError('Укажите --to-category существующей '
+                                   'категории.')
+            changed = update(queryset, chunk_size, category=category)
+        else:
+            changed = update(
+                queryset, chunk_size, is_published=action == 'publish'
+            )
+        self.stdout.write(f'Обработано записей: {changed}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blog import prerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет HTML страниц «О проекте», «Правила», страниц ошибок и '
+        'опубликованных постов в PRERENDER_ROOT для раздачи прокси-сервером. '
+        'С --dirty перерисовывает только посты, изменённые после прошлого '
+        'запуска.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dirty',
+            action='store_true',
+            help='Перерисовать только изменённые посты.',
+        )
+
+    def handle(self, *args, **options):
+        if options['dirty']:
+            changed = prerender.render_dirty()
+        else:
+            changed = prerender.render_all()
+        self.stdout.write(
+            f'Обновлено страниц: {changed} ({prerender.get_root()})'
+        )
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей и публикации из очереди фоновых удалений '
+        'пачками комментариев и постов. Прерванное удаление продолжается '
+        'при следующем запуске.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--max-batches', type=int,
+            help='Сколько пачек обработать за один проход по заданию.',
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            help='Проверять очередь каждые N секунд, не завершаясь.',
+        )
+
+    def report(self, job):
+        state = 'готово' if job.finished_at else 'в работе'
+        self.stdout.write(
+            f'{job}: комментариев {job.comments_deleted}, '
+            f'публикаций {job.posts_deleted} ({state})'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for job in deletion.pending_jobs():
+                deletion.run_job(
+                    job,
+                    batch_size=options['batch_size'],
+                    max_batches=options['max_batches'],
+                    progress=self.report,
+                )
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
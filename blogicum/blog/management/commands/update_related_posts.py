@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from blog.related import forget_all_signatures, update_related_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Находит похожие публикации для новых и изменённых постов; '
+        'с --all пересчитывает их для всего блога.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать похожие публикации для всех постов.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Постов за проход (по умолчанию из RELATED_POSTS).',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            forget_all_signatures()
+        updated = update_related_posts(options['batch_size'])
+        self.stdout.write(f'Обработано публикаций: {updated}')
@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.shortcuts import render
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'pages/429.html', status=429)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+class FixedWindow:
+    # Counts requests per key in fixed windows of `period` seconds with
+    # cache.add() and cache.incr(), which memcached runs atomically, so
+    # concurrent workers never overwrite each other's counts.
+    def __init__(self, cache, limit, period):
+        self.cache = cache
+        self.limit = limit
+        self.period = period
+
+    def take(self, key):
+        # Returns the window's key and 0 when the request fits, otherwise
+        # the number of seconds until the next window starts.
+        now = time.time()
+        window_key = f'{key}:{int(now // self.period)}'
+        self.cache.add(window_key, 0, self.period)
+        try:
+            count = self.cache.incr(window_key)
+        except ValueError:
+            # The window expired between add() and incr().
+            self.cache.add(window_key, 1, self.period)
+            count = 1
+        if count > self.limit:
+            self.give_back(window_key)
+            return window_key, self.period - now % self.period
+        return window_key, 0
+
+    def give_back(self, window_key):
+        try:
+            self.cache.decr(window_key)
+        except ValueError:
+            pass
+
+
+class RateLimitMiddleware:
+    # Throttles writes to the URL names listed in RATE_LIMITS with fixed
+    # windows per user and per client IP, and sheds writes with 429 once
+    # WRITE_CONCURRENCY_LIMIT of them are already running in this process.
+    # A rejected write spends neither a slot nor any of its limits.
+    def __init__(self, get_response):
+        limits = getattr(settings, 'RATE_LIMITS', {})
+        if not limits:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        cache = caches[settings.RATE_LIMIT_CACHE]
+        self.windows = {}
+        for view_name, rates in limits.items():
+            if isinstance(rates, str):
+                rates = {'user': rates, 'ip': rates}
+            self.windows[view_name] = {
+                scope: FixedWindow(cache, *parse_rate(rate))
+                for scope, rate in rates.items()
+            }
+        self.write_slots = threading.BoundedSemaphore(
+            settings.WRITE_CONCURRENCY_LIMIT
+        )
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            if getattr(request, 'holds_write_slot', False):
+                self.write_slots.release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        view_name = request.resolver_match.view_name
+        windows = self.windows.get(view_name)
+        if windows is None:
+            return None
+        if not self.write_slots.acquire(blocking=False):
+            return too_many_requests(request, 1)
+        taken = []
+        for scope, window in windows.items():
+            identity = self.get_identity(request, scope)
+            if identity is None:
+                continue
+            window_key, retry_after = window.take(
+                f'ratelimit:{view_name}:{scope}:{identity}'
+            )
+            if retry_after:
+                for taken_window, taken_key in taken:
+                    taken_window.give_back(taken_key)
+                self.write_slots.release()
+                return too_many_requests(request, retry_after)
+            taken.append((window, window_key))
+        request.holds_write_slot = True
+        return None
+
+    def get_identity(self, request, scope):
+        if scope == 'ip':
+            return request.META.get(settings.RATE_LIMIT_IP_META)
+        if request.user.is_authenticated:
+            return request.user.pk
+        return None
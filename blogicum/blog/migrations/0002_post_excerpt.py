@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.only('id', 'text').order_by('id')
+    batch = []
+    for post in posts.iterator(chunk_size=500):
+        post.excerpt = Truncator(
+            Truncator(post.text).words(10, truncate=' …')
+        ).chars(256)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial_squashed_0012_alter_comment_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=256, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_category_posts(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    Post = apps.get_model('blog', 'Post')
+    published_posts = Post.objects.filter(
+        category_id=OuterRef('pk'), is_published=True
+    ).order_by().values('category_id').annotate(
+        total=Count('pk')
+    ).values('total')
+    Category.objects.update(
+        posts_count=Coalesce(Subquery(published_posts), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Опубликованных постов'),
+        ),
+        migrations.RunPython(count_category_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    Comment = apps.get_model('blog', 'Comment')
+    Post = apps.get_model('blog', 'Post')
+
+    def count(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    author_ids = Post.objects.values_list('author_id', flat=True).distinct()
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id) for author_id in author_ids],
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.update(
+        posts_count=count(Post.objects.all(), 'author_id'),
+        published_count=count(
+            Post.objects.filter(is_published=True), 'author_id'
+        ),
+        comments_received=count(Comment.objects.all(), 'post__author_id'),
+        last_post_date=Subquery(
+            Post.objects.filter(
+                author_id=OuterRef('pk'), is_published=True
+            ).order_by().values('author_id').annotate(
+                last=Max('pub_date')
+            ).values('last')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0003_category_posts_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Всего публикаций')),
+                ('published_count', models.PositiveIntegerField(default=0, verbose_name='Опубликовано')),
+                ('comments_received', models.PositiveIntegerField(default=0, verbose_name='Получено комментариев')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последней публикации')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
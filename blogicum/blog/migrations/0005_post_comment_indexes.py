@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_authorstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at'], name='blog_commen_created_4e025c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='blog_post_pub_dat_b4390a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', 'pub_date'], name='blog_post_is_publ_3be61e_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'публикация'), ('user', 'пользователь')], max_length=8, verbose_name='Что удаляется')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID объекта')),
+                ('comments_deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено комментариев')),
+                ('posts_deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено публикаций')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'фоновое удаление',
+                'verbose_name_plural': 'Фоновые удаления',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='deletionjob',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_deletion_job'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_deletionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Просмотры'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_views_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'популярность публикации',
+                'verbose_name_plural': 'Популярность публикаций',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postscore',
+            index=models.Index(fields=['-score', '-post'], name='blog_postsc_score_cfbe08_idx'),
+        ),
+    ]
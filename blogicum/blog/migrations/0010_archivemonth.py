@@ -0,0 +1,59 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:45
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def count_archive_months(apps, schema_editor):
+    ArchiveMonth = apps.get_model('blog', 'ArchiveMonth')
+    Post = apps.get_model('blog', 'Post')
+    rows = Post.objects.filter(
+        is_published=True, category__isnull=False
+    ).annotate(
+        month=TruncMonth('pub_date', output_field=models.DateField())
+    ).order_by().values('category_id', 'month').annotate(total=Count('pk'))
+    ArchiveMonth.objects.bulk_create(
+        [
+            ArchiveMonth(
+                category_id=row['category_id'],
+                month=row['month'],
+                posts_count=row['total'],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_follow_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Опубликованных постов')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_months', to='blog.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'месяц архива',
+                'verbose_name_plural': 'Месяцы архива',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivemonth',
+            index=models.Index(fields=['month'], name='blog_archiv_month_863134_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('category', 'month'), name='unique_archive_month'),
+        ),
+        migrations.RunPython(count_archive_months, migrations.RunPython.noop),
+    ]
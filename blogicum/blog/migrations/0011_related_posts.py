@@ -0,0 +1,61 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def add_signatures(apps, schema_editor):
+    # Every existing post starts stale, so the first run of
+    # update_related_posts indexes the whole blog.
+    Post = apps.get_model('blog', 'Post')
+    PostSignature = apps.get_model('blog', 'PostSignature')
+    PostSignature.objects.bulk_create(
+        [
+            PostSignature(post_id=pk)
+            for pk in Post.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_archivemonth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('signature', models.BinaryField(null=True)),
+            ],
+            options={
+                'verbose_name': 'сигнатура публикации',
+                'verbose_name_plural': 'Сигнатуры публикаций',
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_posts', to='blog.post', verbose_name='Публикация')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='blog.post', verbose_name='Похожая публикация')),
+            ],
+            options={
+                'verbose_name': 'похожая публикация',
+                'verbose_name_plural': 'Похожие публикации',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', '-score'], name='blog_relate_post_id_890554_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedpost',
+            constraint=models.UniqueConstraint(fields=('post', 'related'), name='unique_related_post'),
+        ),
+        migrations.RunPython(add_signatures, migrations.RunPython.noop),
+    ]
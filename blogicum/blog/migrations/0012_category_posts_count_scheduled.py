@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_related_posts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Опубликованных постов (с отложенными)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_category_posts_count_scheduled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='pending_deletion',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ожидает удаления'),
+        ),
+    ]
@@ -1,11 +1,22 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.text import Truncator
 
 MAX_RETURN_LENGTH = 50
 MAX_LENGTH = 256
+EXCERPT_WORDS = 10
+# views_count only changes through blog.view_counts.flush(); posts loaded
+# for editing defer it, so saving them leaves the stored count alone.
+EDIT_DEFERRED_FIELDS = ('views_count',)
 User = get_user_model()
 
 
+def make_excerpt(text):
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(MAX_LENGTH)
+
+
 class BaseBlogModel(models.Model):
     is_published = models.BooleanField(
         verbose_name='Опубликовано',
@@ -44,6 +55,18 @@ class Category(BaseBlogModel):
         help_text='Идентификатор страницы для URL; разрешены символы '
                   'латиницы, цифры, дефис и подчёркивание.'
     )
+    # Kept by blog.stats on post saves, so scheduled posts are counted from
+    # the moment they are saved published, not when their pub_date comes.
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Опубликованных постов (с отложенными)',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'категория'
@@ -57,6 +80,12 @@ class Post(BaseBlogModel):
     title = models.CharField(verbose_name='Заголовок', max_length=MAX_LENGTH)
     content = models.TextField(null=True)
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.CharField(
+        verbose_name='Анонс',
+        max_length=MAX_LENGTH,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text='Если установить дату и время в будущем — можно делать '
@@ -88,15 +117,39 @@ class Post(BaseBlogModel):
         null=True,
         blank=True
     )
+    views_count = models.PositiveBigIntegerField(
+        verbose_name='Просмотры',
+        default=0,
+        editable=False
+    )
+    # Set while `manage.py process_deletions` removes the post; it stays
+    # hidden and cannot be edited back into publication meanwhile.
+    pending_deletion = models.BooleanField(
+        verbose_name='Ожидает удаления',
+        default=False,
+        editable=False
+    )
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['is_published', 'pub_date']),
+        ]
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
 
     def __str__(self):
         return self.title[:MAX_RETURN_LENGTH]
 
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.text)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
 
 class Comment(BaseBlogModel):
     post = models.ForeignKey(
@@ -114,8 +167,273 @@ class Comment(BaseBlogModel):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [models.Index(fields=['created_at'])]
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return f'{self.author} - {self.text[:MAX_RETURN_LENGTH]}'
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Всего публикаций',
+        default=0
+    )
+    published_count = models.PositiveIntegerField(
+        verbose_name='Опубликовано',
+        default=0
+    )
+    comments_received = models.PositiveIntegerField(
+        verbose_name='Получено комментариев',
+        default=0
+    )
+    last_post_date = models.DateTimeField(
+        verbose_name='Дата последней публикации',
+        null=True,
+        blank=True
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author} - {self.posts_count}'
+
+
+class DeletionJob(models.Model):
+    POST = 'post'
+    USER = 'user'
+    KINDS = [(POST, 'публикация'), (USER, 'пользователь')]
+
+    kind = models.CharField(
+        verbose_name='Что удаляется',
+        max_length=8,
+        choices=KINDS
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name='ID объекта')
+    comments_deleted = models.PositiveIntegerField(
+        verbose_name='Удалено комментариев',
+        default=0
+    )
+    posts_deleted = models.PositiveIntegerField(
+        verbose_name='Удалено публикаций',
+        default=0
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Обновлено',
+        auto_now=True
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='Завершено',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_deletion_job'
+            ),
+        ]
+        verbose_name = 'фоновое удаление'
+        verbose_name_plural = 'Фоновые удаления'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} #{self.object_id}'
+
+
+class PostScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Публикация'
+    )
+    score = models.FloatField(verbose_name='Популярность', default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['-score', '-post'])]
+        verbose_name = 'популярность публикации'
+        verbose_name_plural = 'Популярность публикаций'
+
+    def __str__(self):
+        return f'{self.post_id} - {self.score:.2f}'
+
+
+class ArchiveMonth(models.Model):
+    # Published posts of a category per month of pub_date (local time).
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='archive_months',
+        verbose_name='Категория'
+    )
+    month = models.DateField(verbose_name='Месяц')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Опубликованных постов',
+        default=0
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'month'], name='unique_archive_month'
+            ),
+        ]
+        indexes = [models.Index(fields=['month'])]
+        verbose_name = 'месяц архива'
+        verbose_name_plural = 'Месяцы архива'
+
+    def __str__(self):
+        return f'{self.category} - {self.month:%Y-%m}'
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='followers',
+        verbose_name='Автор'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='followers',
+        verbose_name='Категория'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Добавлено',
+        auto_now_add=True
+    )
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(author__isnull=False, category__isnull=True)
+                    | models.Q(author__isnull=True, category__isnull=False)
+                ),
+                name='follow_author_or_category',
+            ),
+            models.UniqueConstraint(
+                fields=['follower', 'author'], name='unique_author_follow'
+            ),
+            models.UniqueConstraint(
+                fields=['follower', 'category'],
+                name='unique_category_follow'
+            ),
+        ]
+        verbose_name = 'подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.follower} - {self.author or self.category}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Публикация'
+    )
+    # Copy of the post's pub_date, so a page of the timeline is one range
+    # scan on the (user, pub_date) index.
+    pub_date = models.DateTimeField(verbose_name='Дата и время публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [models.Index(fields=['user', '-pub_date', '-post'])]
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Записи лент'
+
+    def __str__(self):
+        return f'{self.user_id} - {self.post_id}'
+
+
+class PostSignature(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Публикация'
+    )
+    # MinHash of the post's words; None until `manage.py
+    # update_related_posts` (re)computes it.
+    signature = models.BinaryField(null=True, editable=False)
+
+    class Meta:
+        verbose_name = 'сигнатура публикации'
+        verbose_name_plural = 'Сигнатуры публикаций'
+
+    def __str__(self):
+        return str(self.post_id)
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts',
+        verbose_name='Публикация'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_to',
+        verbose_name='Похожая публикация'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'related'], name='unique_related_post'
+            ),
+        ]
+        indexes = [models.Index(fields=['post', '-score'])]
+        verbose_name = 'похожая публикация'
+        verbose_name_plural = 'Похожие публикации'
+
+    def __str__(self):
+        return f'{self.post_id} - {self.related_id}'
@@ -0,0 +1,187 @@
+from functools import partial
+
+from django.db import models, transaction
+from django.db.models import Count, Q
+
+from .feeds import forget_rendered_feeds
+from .models import Comment, Post
+from .page_cache import forget_cached_pages
+from .prerender import mark_post_dirty
+from .sitemaps import mark_shard_dirty, shard_of
+from .stats import (
+    recount_archive,
+    recount_author_stats,
+    recount_category_posts,
+)
+from .timelines import refresh_timelines
+from .trending import add_comment_scores
+
+CHUNK_SIZE = 1000
+
+
+def filter_posts(queryset=None, author=None, category=None, since=None,
+                 until=None, text=None):
+    posts = Post.objects.all() if queryset is None else queryset
+    if author:
+        posts = posts.filter(author__username=author)
+    if category:
+        posts = posts.filter(category__slug=category)
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    if text:
+        posts = posts.filter(Q(title__iregex=text) | Q(text__iregex=text))
+    return posts
+
+
+def filter_comments(queryset=None, author=None, category=None, since=None,
+                    until=None, text=None):
+    comments = Comment.objects.all() if queryset is None else queryset
+    if author:
+        comments = comments.filter(author__username=author)
+    if category:
+        comments = comments.filter(post__category__slug=category)
+    if since:
+        comments = comments.filter(created_at__gte=since)
+    if until:
+        comments = comments.filter(created_at__lt=until)
+    if text:
+        comments = comments.filter(text__iregex=text)
+    return comments
+
+
+def in_chunks(queryset, chunk_size=CHUNK_SIZE):
+    # Walks the matching primary keys in order, so rows an update stops
+    # matching are neither skipped nor visited twice.
+    last_pk = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+def forget_changed_posts(post_ids, author_ids, category_ids):
+    # Invalidation for a whole batch: what the post signals do per row.
+    category_ids = {pk for pk in category_ids if pk is not None}
+    recount_category_posts(category_ids)
+    recount_archive(category_ids)
+    recount_author_stats(set(author_ids))
+    forget_rendered_feeds()
+    forget_cached_pages()
+    mark_shard_dirty(*{shard_of(pk) for pk in post_ids})
+    mark_post_dirty(*post_ids)
+    refresh_timelines(post_ids)
+
+
+def post_owners(post_ids):
+    rows = Post.objects.filter(pk__in=post_ids).values_list(
+        'author_id', 'category_id'
+    )
+    return {row[0] for row in rows}, {row[1] for row in rows}
+
+
+def update_posts(queryset, chunk_size=CHUNK_SIZE, **changes):
+    updated = 0
+    for ids in in_chunks(queryset, chunk_size):
+        author_ids, category_ids = post_owners(ids)
+        updated += Post.objects.filter(pk__in=ids).update(**changes)
+        if 'category' in changes:
+            category_ids.add(getattr(changes['category'], 'pk', None))
+        forget_changed_posts(ids, author_ids, category_ids)
+    return updated
+
+
+def delete_post_dependents(post_ids, using):
+    # Rows referencing the posts are removed (or detached) with plain
+    # statements too, following each relation's on_delete.
+    for relation in Post._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        rows = relation.related_model._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': post_ids}
+        )
+        if relation.on_delete is models.CASCADE:
+            rows._raw_delete(using)
+        elif relation.on_delete is models.SET_NULL:
+            rows.update(**{relation.field.name: None})
+
+
+def delete_images(images):
+    storage = Post._meta.get_field('image').storage
+    for image in images:
+        storage.delete(image)
+
+
+def delete_posts(queryset, chunk_size=CHUNK_SIZE):
+    # Plain DELETE statements: the collector would load every post and
+    # comment to send their signals, the counters are recounted instead.
+    deleted = 0
+    for ids in in_chunks(queryset, chunk_size):
+        author_ids, category_ids = post_owners(ids)
+        posts = Post.objects.filter(pk__in=ids)
+        images = [
+            image for image in posts.values_list('image', flat=True) if image
+        ]
+        with transaction.atomic():
+            delete_post_dependents(ids, posts.db)
+            deleted += posts._raw_delete(posts.db)
+            # Inside an outer transaction (a deletion job's batch) the
+            # files go only once it commits, so a rollback keeps them.
+            transaction.on_commit(partial(delete_images, images))
+        forget_changed_posts(ids, author_ids, category_ids)
+    return deleted
+
+
+def forget_changed_comments(post_ids):
+    forget_cached_pages()
+    mark_post_dirty(*set(post_ids))
+
+
+def comment_counts(comments):
+    # {post id: (published comments, all comments)} of a chunk.
+    return {
+        row['post_id']: (row['published'], row['total'])
+        for row in comments.order_by().values('post_id').annotate(
+            published=Count('pk', filter=Q(is_published=True)),
+            total=Count('pk'),
+        )
+    }
+
+
+def update_comments(queryset, chunk_size=CHUNK_SIZE, **changes):
+    updated = 0
+    for ids in in_chunks(queryset, chunk_size):
+        comments = Comment.objects.filter(pk__in=ids)
+        counts = comment_counts(comments)
+        updated += comments.update(**changes)
+        if 'is_published' in changes:
+            add_comment_scores({
+                pk: (total if changes['is_published'] else 0) - published
+                for pk, (published, total) in counts.items()
+            })
+        forget_changed_comments(counts)
+    return updated
+
+
+def delete_comments(queryset, chunk_size=CHUNK_SIZE):
+    deleted = 0
+    for ids in in_chunks(queryset, chunk_size):
+        comments = Comment.objects.filter(pk__in=ids)
+        counts = comment_counts(comments)
+        post_ids = set(counts)
+        deleted += comments._raw_delete(comments.db)
+        add_comment_scores({
+            pk: -published for pk, (published, _) in counts.items()
+        })
+        forget_changed_comments(post_ids)
+        recount_author_stats(set(Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('author_id', flat=True)))
+    return deleted
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from . import publishing
+from .caching import seconds_until_next_post
+from .forms import CommentForm
+from .models import Post
+from .timelines import is_following
+
+# The only query parameters the cached views read; others must neither
+# split the cache nor bypass it.
+KEY_PARAMETERS = ('page', 'cursor')
+PLACEHOLDER = '<!--personal {} {}-->'
+PLACEHOLDER_RE = re.compile(r'<!--personal (\S+) (\{.*?\})-->')
+
+
+def follow_button_context(request, kind, target):
+    user = request.user
+    if not user.is_authenticated or (
+        kind == 'author' and user.username == target
+    ):
+        return {}
+    following = is_following(user, kind, target)
+    action = 'unfollow' if following else 'follow'
+    return {
+        'following': following,
+        'action': reverse(f'blog:{action}_{kind}', args=[target]),
+    }
+
+
+# Fragments whose templates need more than the placeholder arguments.
+FRAGMENT_CONTEXT = {
+    'includes/comment_form.html': lambda request, **arguments: {
+        'form': CommentForm()
+    },
+    'includes/follow_button.html': follow_button_context,
+}
+
+
+def is_shared_render(request):
+    return getattr(request, 'shared_render', False)
+
+
+def private_page(request):
+    # Called by a view whose body depends on the user (an author looking at
+    # an unpublished post): such a page is rendered in full and not cached.
+    request.shared_render = False
+
+
+def placeholder(template_name, arguments):
+    encoded = json.dumps(arguments, sort_keys=True).replace('>', '\\u003e')
+    return PLACEHOLDER.format(template_name, encoded)
+
+
+def fragment_context(request, template_name, arguments):
+    if template_name not in FRAGMENT_CONTEXT:
+        return {}
+    return FRAGMENT_CONTEXT[template_name](request, **arguments)
+
+
+def fill_placeholders(request, content):
+    def render_fragment(match):
+        template_name = match.group(1)
+        context = json.loads(match.group(2))
+        context.update(fragment_context(request, template_name, context))
+        return render_to_string(template_name, context, request=request)
+
+    return PLACEHOLDER_RE.sub(render_fragment, content)
+
+
+def forget_cached_pages():
+    # Bodies are cached per worker, the generation they are keyed by is
+    # shared, so a change retires the bodies in every worker.
+    if settings.PAGE_CACHE['ENABLED']:
+        publishing.bump_generation(settings.PAGE_CACHE_GENERATION_FILE)
+
+
+def page_cache_key(request):
+    generation = publishing.read_generation(
+        settings.PAGE_CACHE_GENERATION_FILE
+    )
+    parameters = [
+        (name, request.GET[name]) for name in KEY_PARAMETERS
+        if name in request.GET
+    ]
+    path = hashlib.md5(
+        json.dumps([request.path, parameters]).encode()
+    ).hexdigest()
+    return f'blog:page:{generation}:{path}'
+
+
+def cache_shared_page(view):
+    # Two-phase rendering: the view renders once with placeholders in place
+    # of the per-user fragments (header, owner controls, comment form) and
+    # that body is cached for everybody; every request then only renders
+    # the fragments into it.
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.PAGE_CACHE['ENABLED'] or request.method != 'GET':
+            return view(request, *args, **kwargs)
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            request.shared_render = True
+            response = view(request, *args, **kwargs)
+            if not is_shared_render(request):
+                return response
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    {
+                        'content': response.content.decode(response.charset),
+                        'content_type': response['Content-Type'],
+                    },
+                    seconds_until_next_post(
+                        Post.objects.all(), settings.PAGE_CACHE['TIMEOUT']
+                    ),
+                )
+            content = response.content.decode(response.charset)
+        else:
+            response = HttpResponse(content_type=cached['content_type'])
+            content = cached['content']
+        response.content = fill_placeholders(request, content)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
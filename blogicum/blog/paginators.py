@@ -0,0 +1,253 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+
+class BlogPage(Page):
+    @property
+    def page_window(self):
+        return self.paginator.get_page_window(self)
+
+
+class LookaheadPage(BlogPage):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class BlogPaginator(Paginator):
+    # Renders a window of page links ("1 … 4 5 6 7 8 … 40") instead of the
+    # whole page_range.
+    has_known_count = True
+
+    def _get_page(self, *args, **kwargs):
+        return BlogPage(*args, **kwargs)
+
+    def get_page_window(self, page):
+        return self.get_elided_page_range(
+            page.number,
+            on_each_side=PAGES_ON_EACH_SIDE,
+            on_ends=PAGES_ON_ENDS,
+        )
+
+
+class CountedPaginator(BlogPaginator):
+    # Paginator over a queryset whose size is already known (for example
+    # from a maintained counter), so no COUNT(*) is issued.
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @property
+    def count(self):
+        return self._known_count
+
+
+class NoCountPaginator(BlogPaginator):
+    # Never counts: each page fetches per_page + 1 rows and the extra row
+    # only tells whether a next page exists.
+    has_known_count = False
+
+    @property
+    def count(self):
+        return None
+
+    @property
+    def num_pages(self):
+        return None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return LookaheadPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+    def get_page_window(self, page):
+        last = page.number + 1 if page.has_next() else page.number
+        return range(max(1, page.number - PAGES_ON_EACH_SIDE), last + 1)
+
+
+class EstimatedCountPaginator(NoCountPaginator):
+    # Counts at most once per `timeout` seconds; the cached total only
+    # shapes the page links, next-page detection still uses the lookahead
+    # row, so a stale estimate never hides or invents a page.
+    has_known_count = True
+
+    def __init__(self, object_list, per_page, cache_key, timeout, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(self.cache_key, count, self.timeout)
+        return count
+
+    @property
+    def num_pages(self):
+        return ceil(max(1, self.count - self.orphans) / self.per_page)
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            pass
+        try:
+            return self.page(self.num_pages)
+        except EmptyPage:
+            return self.page(1)
+
+    def get_page_window(self, page):
+        if page.number > self.num_pages or (
+            page.has_next() and page.number == self.num_pages
+        ):
+            return super().get_page_window(page)
+        return BlogPaginator.get_page_window(self, page)
+
+
+class AdminEstimatedCountPaginator(Paginator):
+    # Changelist counts are cached per filtered query for
+    # ADMIN_COUNT_TIMEOUT seconds instead of running COUNT(*) on every page.
+    @cached_property
+    def count(self):
+        key = 'blog:admin:count:' + hashlib.md5(
+            str(self.object_list.query).encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.ADMIN_COUNT_TIMEOUT)
+        return count
+
+
+class CursorPage:
+    def __init__(self, object_list, cursor, next_cursor):
+        self.object_list = object_list
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    # Keyset pagination over a descending ordering: the cursor carries the
+    # ordering values of the last row shown, so every page is one range
+    # scan on the index, however deep the reader goes.
+    def __init__(self, object_list, per_page, ordering):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = ordering
+
+    def encode(self, item):
+        values = []
+        for field in self.ordering:
+            value = item
+            for name in field.split('__'):
+                value = getattr(value, name)
+            values.append(value)
+        return self.encode_values(values)
+
+    def encode_values(self, values):
+        return urlsafe_b64encode(
+            json.dumps(values, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def ordering_fields(self):
+        fields = []
+        for path in self.ordering:
+            model, names = self.object_list.model, path.split('__')
+            for name in names[:-1]:
+                model = model._meta.get_field(name).related_model
+            fields.append(model._meta.get_field(names[-1]))
+        return fields
+
+    def decode(self, cursor):
+        # The cursor comes from the query string: each value is converted
+        # by its field, and anything that does not fit means the first page.
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(
+                self.ordering
+            ):
+                return None
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.ordering_fields(), values)
+            ]
+        except (AttributeError, TypeError, ValueError, ValidationError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def after(self, values):
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            before = Q(**{f'{field}__lt': value})
+            if condition is not None:
+                before |= Q(**{field: value}) & condition
+            condition = before
+        return condition
+
+    def get_page(self, cursor):
+        values = self.decode(cursor) if cursor else None
+        items = self.object_list.order_by(
+            *[f'-{field}' for field in self.ordering]
+        )
+        if values is not None:
+            items = items.filter(self.after(values))
+        rows = list(items[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode(rows[-1])
+        return CursorPage(
+            rows, cursor if values is not None else None, next_cursor
+        )
@@ -0,0 +1,146 @@
+import shutil
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from pages import views as pages_views
+
+from . import publishing
+from .models import Post
+from .publishing import AtomicFile
+from .visibility import get_queryset
+
+PAGES = ('pages:about', 'pages:rules')
+ERROR_PAGES = {
+    '403csrf.html': pages_views.csrf_failure_handler,
+    '404.html': pages_views.page_not_found_handler,
+    '500.html': pages_views.server_error_handler,
+}
+CHUNK_SIZE = 500
+
+
+def get_root():
+    return settings.PRERENDER_ROOT
+
+
+def anonymous_request(path):
+    # Pages are rendered as an anonymous visitor would see them; the front
+    # proxy serves them only to requests without a session cookie.
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META['HTTP_HOST'] = urlsplit(settings.SITE_URL).netloc
+    request.user = AnonymousUser()
+    # The files are only rewritten when the post changes, so templates
+    # leave out what changes without it (view counts, related posts).
+    request.prerendering = True
+    return request
+
+
+def render_path(path):
+    request = anonymous_request(path)
+    match = request.resolver_match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+def page_file(path):
+    return get_root() / path.strip('/') / 'index.html'
+
+
+def write_file(target, content):
+    # Unchanged pages are not rewritten, so their mtime and the ETag the
+    # proxy derives from it stay stable.
+    if target.exists() and target.read_text(encoding='utf-8') == content:
+        return False
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with AtomicFile(target) as output:
+        output.write(content)
+    return True
+
+
+def render_page(path):
+    response = render_path(path)
+    target = page_file(path)
+    if response.status_code != 200:
+        if target.exists():
+            shutil.rmtree(target.parent)
+            return True
+        return False
+    return write_file(target, response.content.decode(response.charset))
+
+
+def render_post(post_id):
+    return render_page(reverse('blog:post_detail', args=[post_id]))
+
+
+def render_static_pages():
+    changed = 0
+    for name in PAGES:
+        changed += render_page(reverse(name))
+    for filename, handler in ERROR_PAGES.items():
+        response = handler(anonymous_request('/' + filename))
+        changed += write_file(
+            get_root() / filename,
+            response.content.decode(response.charset),
+        )
+    return changed
+
+
+def render_all_posts():
+    changed = 0
+    post_ids = get_queryset(Post.objects).order_by('id').values_list(
+        'id', flat=True
+    )
+    rendered = set()
+    for post_id in post_ids.iterator(chunk_size=CHUNK_SIZE):
+        changed += render_post(post_id)
+        rendered.add(str(post_id))
+    posts_dir = get_root() / 'posts'
+    if posts_dir.is_dir():
+        for stale in posts_dir.iterdir():
+            if stale.name not in rendered:
+                shutil.rmtree(stale)
+                changed += 1
+    return changed
+
+
+def render_all():
+    now = timezone.now()
+    get_root().mkdir(parents=True, exist_ok=True)
+    publishing.clear_dirty(get_root())
+    changed = render_static_pages() + render_all_posts()
+    publishing.mark_swept(get_root(), now)
+    return changed
+
+
+def mark_post_dirty(*post_ids):
+    publishing.mark_dirty(get_root(), *post_ids)
+
+
+def mark_category_posts_dirty(category_id):
+    # Post pages show the category and disappear with it.
+    mark_post_dirty(*Post.objects.filter(
+        category_id=category_id
+    ).order_by().values_list('id', flat=True))
+
+
+def render_dirty():
+    root = get_root()
+    now = timezone.now()
+    since = publishing.last_swept(root)
+    post_ids = publishing.take_dirty(root)
+    if since is not None:
+        post_ids |= {str(post_id) for post_id in Post.objects.filter(
+            pub_date__gt=since, pub_date__lte=now
+        ).values_list('id', flat=True)}
+    changed = sum(render_post(int(post_id)) for post_id in post_ids)
+    if root.is_dir():
+        publishing.mark_swept(root, now)
+    return changed
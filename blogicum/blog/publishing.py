@@ -0,0 +1,86 @@
+import os
+import tempfile
+from datetime import datetime
+
+DIRTY_FILENAME = '.dirty'
+SWEPT_FILENAME = '.swept'
+
+
+class AtomicFile:
+    # Writes next to the target and renames on close, so the front proxy
+    # never serves a half-written file.
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        handle, self.temp_path = tempfile.mkstemp(
+            dir=self.path.parent, suffix='.tmp'
+        )
+        self.file = os.fdopen(handle, 'w', encoding='utf-8')
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        if exc_type is None:
+            os.chmod(self.temp_path, 0o644)
+            os.replace(self.temp_path, self.path)
+        else:
+            os.unlink(self.temp_path)
+
+
+def mark_dirty(root, *keys):
+    # Changes are only recorded once the output has been generated; the
+    # list is consumed by the `--dirty` mode of the generating command.
+    if keys and root.is_dir():
+        with open(root / DIRTY_FILENAME, 'a', encoding='utf-8') as dirty:
+            dirty.write(''.join(f'{key}\n' for key in keys))
+
+
+def clear_dirty(root):
+    (root / DIRTY_FILENAME).unlink(missing_ok=True)
+
+
+def take_dirty(root):
+    processing = root / (DIRTY_FILENAME + '.processing')
+    try:
+        os.replace(root / DIRTY_FILENAME, processing)
+    except FileNotFoundError:
+        return set()
+    with open(processing, encoding='utf-8') as dirty:
+        keys = {line.strip() for line in dirty if line.strip()}
+    processing.unlink()
+    return keys
+
+
+# Scheduled posts appear once their pub_date passes, with no save to mark
+# them dirty; the `--dirty` mode picks up the pub_dates that fell between
+# two runs.
+def last_swept(root):
+    try:
+        return datetime.fromisoformat(
+            (root / SWEPT_FILENAME).read_text(encoding='utf-8').strip()
+        )
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def mark_swept(root, now):
+    with AtomicFile(root / SWEPT_FILENAME) as swept:
+        swept.write(now.isoformat())
+
+
+# Generation numbers in files shared by all worker processes; content keyed
+# by an older generation is no longer served by any of them.
+def read_generation(path):
+    try:
+        return int(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation(path):
+    generation = read_generation(path) + 1
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with AtomicFile(path) as output:
+        output.write(str(generation))
+    return generation
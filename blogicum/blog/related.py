@@ -0,0 +1,204 @@
+import random
+import re
+import zlib
+from heapq import nlargest
+from itertools import chain
+
+import numpy
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Post, PostSignature, RelatedPost
+
+NUM_HASHES = 64
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_RE = re.compile(r'\w{3,}')
+SIGNATURE_CHUNK_SIZE = 2000
+
+# A fixed seed keeps signatures stored by earlier runs comparable. The
+# factors stay below 2**32, so a * hash + b never overflows uint64.
+_random = random.Random(2023)
+FACTORS, OFFSETS = (
+    numpy.array(values, dtype=numpy.uint64)[:, None]
+    for values in zip(*[
+        (_random.randrange(1, MAX_HASH), _random.randrange(0, MAX_HASH))
+        for _ in range(NUM_HASHES)
+    ])
+)
+
+
+def post_words(title, text):
+    return {
+        zlib.crc32(word.encode())
+        for word in WORD_RE.findall(f'{title} {text}'.lower())
+    }
+
+
+def minhash(words):
+    # Empty for a post without words: it is never related to anything.
+    if not words:
+        return b''
+    hashes = numpy.fromiter(words, dtype=numpy.uint64, count=len(words))
+    values = (FACTORS * hashes + OFFSETS) % PRIME
+    return (values.min(axis=1) & MAX_HASH).tobytes()
+
+
+def similar_pairs(queries, signatures, min_score):
+    # (query index, signature index, estimated Jaccard similarity) for
+    # every pair at or above min_score.
+    def matrix(items):
+        return numpy.frombuffer(
+            b''.join(items), dtype=numpy.uint64
+        ).reshape(-1, NUM_HASHES)
+
+    scores = (
+        matrix(queries)[:, None, :] == matrix(signatures)[None, :, :]
+    ).mean(axis=2)
+    rows, columns = numpy.nonzero(scores >= min_score)
+    return zip(rows.tolist(), columns.tolist(), scores[rows, columns])
+
+
+# The fields the signature is computed from.
+SIGNATURE_FIELDS = ('title', 'text')
+
+
+def signature_changed(post, update_fields=None):
+    # Compares the saved words with the stored signature instead of
+    # reading the previous text back.
+    saved = set(SIGNATURE_FIELDS) - post.get_deferred_fields()
+    if update_fields is not None:
+        saved &= set(update_fields)
+    if not saved:
+        return False
+    if saved != set(SIGNATURE_FIELDS):
+        return True
+    stored = PostSignature.objects.filter(post_id=post.pk).values_list(
+        'signature', flat=True
+    ).first()
+    return stored is None or bytes(stored) != minhash(
+        post_words(post.title, post.text)
+    )
+
+
+def forget_signature(post_id):
+    if not PostSignature.objects.filter(post_id=post_id).update(
+        signature=None
+    ):
+        PostSignature.objects.bulk_create(
+            [PostSignature(post_id=post_id)], ignore_conflicts=True
+        )
+
+
+def forget_all_signatures():
+    PostSignature.objects.update(signature=None)
+    PostSignature.objects.bulk_create(
+        [
+            PostSignature(post_id=pk) for pk in Post.objects.filter(
+                signature__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def indexed_signatures(exclude):
+    # The stored signatures in chunks of (post ids, signatures).
+    signatures = PostSignature.objects.filter(
+        signature__isnull=False
+    ).exclude(signature=b'').exclude(post_id__in=exclude).order_by(
+        'post_id'
+    ).values_list('post_id', 'signature')
+    chunk = []
+    for post_id, signature in signatures.iterator(
+        chunk_size=SIGNATURE_CHUNK_SIZE
+    ):
+        chunk.append((post_id, bytes(signature)))
+        if len(chunk) == SIGNATURE_CHUNK_SIZE:
+            yield zip(*chunk)
+            chunk = []
+    if chunk:
+        yield zip(*chunk)
+
+
+def find_neighbours(signatures, post_ids, count, min_score):
+    batch = [pk for pk, signature in signatures.items() if signature]
+    own = {pk: [] for pk in batch}
+    incoming = {}
+    if not batch:
+        return own, incoming
+    queries = [signatures[pk] for pk in batch]
+    chunks = chain(indexed_signatures(post_ids), [(batch, queries)])
+    for ids, chunk in chunks:
+        for row, column, score in similar_pairs(queries, chunk, min_score):
+            post_id, other_id = batch[row], ids[column]
+            if other_id == post_id:
+                continue
+            own[post_id].append((float(score), other_id))
+            if other_id not in own:
+                incoming.setdefault(other_id, []).append(
+                    (float(score), post_id)
+                )
+        for items in (own, incoming):
+            for pk in items:
+                items[pk] = nlargest(count, items[pk])
+    return own, incoming
+
+
+def update_batch(post_ids):
+    # Compares the batch with every indexed post once, chunk by chunk. The
+    # batch gets fresh neighbour lists, and older posts whose list it now
+    # makes get it merged into theirs. An edited post only drops out of
+    # lists it no longer deserves; a full rebuild refills those.
+    count = settings.RELATED_POSTS['COUNT']
+    min_score = settings.RELATED_POSTS['MIN_SCORE']
+    signatures = {
+        pk: minhash(post_words(title, text))
+        for pk, title, text in Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('pk', 'title', 'text')
+    }
+    own, incoming = find_neighbours(signatures, post_ids, count, min_score)
+    with transaction.atomic():
+        RelatedPost.objects.filter(
+            Q(post_id__in=post_ids) | Q(related_id__in=post_ids)
+        ).delete()
+        current = RelatedPost.objects.filter(post_id__in=list(incoming))
+        for pk, score, related_id in current.values_list(
+            'post_id', 'score', 'related_id'
+        ):
+            incoming[pk].append((score, related_id))
+        current.delete()
+        RelatedPost.objects.bulk_create(
+            [
+                RelatedPost(post_id=pk, related_id=related_id, score=score)
+                for items in (own, incoming)
+                for pk, neighbours in items.items()
+                for score, related_id in nlargest(count, neighbours)
+            ],
+            batch_size=1000,
+        )
+        PostSignature.objects.bulk_update(
+            [
+                PostSignature(post_id=pk, signature=signature)
+                for pk, signature in signatures.items()
+            ],
+            ['signature'],
+            batch_size=1000,
+        )
+
+
+def update_related_posts(batch_size=None):
+    # Indexes the posts created or edited since the last run.
+    batch_size = batch_size or settings.RELATED_POSTS['BATCH_SIZE']
+    updated = 0
+    while True:
+        post_ids = list(PostSignature.objects.filter(
+            signature__isnull=True
+        ).order_by('post_id').values_list('post_id', flat=True)[:batch_size])
+        if not post_ids:
+            return updated
+        update_batch(post_ids)
+        updated += len(post_ids)
@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .backends import forget_cached_user
+from .caching import forget_published_categories, forget_published_locations
+from .feeds import forget_post_feeds, forget_rendered_feeds
+from .models import Category, Comment, Follow, Location, Post
+from .moderation import delete_comments
+from .page_cache import forget_cached_pages
+from .prerender import mark_category_posts_dirty, mark_post_dirty
+from .related import forget_signature, signature_changed
+from .sitemaps import (
+    CATEGORIES_SHARD,
+    mark_category_dirty,
+    mark_shard_dirty,
+    shard_of,
+)
+from .stats import (
+    POST_STATE_FIELDS,
+    change_author_stats,
+    counted_category_id,
+    get_post_state,
+    move_archive_post,
+    move_author_post,
+    move_category_post,
+    move_received_comment,
+)
+from .timelines import follow_added, follow_removed, update_timelines
+from .trending import add_comment_score
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    forget_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_cached_user(user.pk)
+
+
+@receiver(pre_save, sender=Category)
+def remember_previous_category(sender, instance, **kwargs):
+    instance._was_published = None
+    if instance.pk is not None:
+        instance._was_published = Category.objects.filter(
+            pk=instance.pk
+        ).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def mark_changed_category(sender, instance, created, **kwargs):
+    was_published = instance._was_published
+    if not created and (was_published or instance.is_published):
+        mark_category_posts_dirty(instance.pk)
+    if was_published is not None and was_published != instance.is_published:
+        mark_category_dirty(instance.pk)
+
+
+# Before the collector detaches the posts from the category.
+@receiver(pre_delete, sender=Category)
+def mark_deleted_category(sender, instance, **kwargs):
+    if instance.is_published:
+        mark_category_posts_dirty(instance.pk)
+        mark_category_dirty(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def forget_changed_category(sender, **kwargs):
+    forget_published_categories()
+    forget_rendered_feeds()
+    forget_cached_pages()
+    mark_shard_dirty(CATEGORIES_SHARD)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def forget_changed_location(sender, **kwargs):
+    forget_published_locations()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, **kwargs):
+    instance._previous_state = None
+    if instance.pk is not None:
+        instance._previous_state = Post.objects.filter(
+            pk=instance.pk
+        ).values(*POST_STATE_FIELDS).first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, update_fields=None,
+                     **kwargs):
+    old, new = instance._previous_state, get_post_state(instance)
+    forget_post_feeds(old, new)
+    forget_cached_pages()
+    mark_shard_dirty(shard_of(instance.pk))
+    mark_post_dirty(instance.pk)
+    move_category_post(counted_category_id(old), counted_category_id(new))
+    move_author_post(old, new)
+    move_archive_post(old, new)
+    update_timelines(instance.pk, old, new)
+    if created or signature_changed(instance, update_fields):
+        forget_signature(instance.pk)
+    if old is not None and old['author_id'] != new['author_id']:
+        comments = Comment.objects.filter(post_id=instance.pk).count()
+        change_author_stats(old['author_id'], comments_received=-comments)
+        change_author_stats(new['author_id'], comments_received=comments)
+
+
+# Comments have no delete receivers, so the collector removes a post's or
+# a user's comments with one query; the counters are adjusted here once per
+# post or user, and moderation.delete_comments() handles direct deletes.
+@receiver(pre_delete, sender=User)
+def delete_user_comments(sender, instance, **kwargs):
+    # Comments on the user's own posts go with the posts.
+    delete_comments(Comment.objects.filter(author_id=instance.pk).exclude(
+        post__author_id=instance.pk
+    ))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post(sender, instance, **kwargs):
+    instance._previous_state = get_post_state(instance)
+    instance._comments_count = Comment.objects.filter(
+        post_id=instance.pk
+    ).count()
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    old = instance._previous_state
+    forget_post_feeds(old)
+    forget_cached_pages()
+    mark_shard_dirty(shard_of(instance.pk))
+    mark_post_dirty(instance.pk)
+    move_category_post(counted_category_id(old), None)
+    move_author_post(old, None)
+    move_archive_post(old, None)
+    change_author_stats(
+        old['author_id'], comments_received=-instance._comments_count
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, **kwargs):
+    mark_post_dirty(instance.post_id)
+    forget_cached_pages()
+    if created:
+        move_received_comment(instance.post_id, 1)
+        if instance.is_published:
+            add_comment_score(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_created_follow(sender, instance, created, **kwargs):
+    if created:
+        follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    follow_removed(instance)
@@ -0,0 +1,172 @@
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from . import publishing
+from .caching import published_category_ids
+from .models import Category, Post
+from .publishing import AtomicFile
+
+INDEX_FILENAME = 'sitemap.xml'
+CATEGORIES_FILENAME = 'categories.xml'
+POSTS_FILENAME = 'posts-{}.xml'
+CATEGORIES_SHARD = 'categories'
+CHUNK_SIZE = 2000
+
+URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_FOOTER = '</urlset>\n'
+
+
+def get_root():
+    return settings.SITEMAP_ROOT
+
+
+def absolute_url(path):
+    return escape(settings.SITE_URL.rstrip('/') + path)
+
+
+def url_entry(path, lastmod=None):
+    lastmod = f'<lastmod>{lastmod.date().isoformat()}</lastmod>' if (
+        lastmod
+    ) else ''
+    return f'<url><loc>{absolute_url(path)}</loc>{lastmod}</url>\n'
+
+
+def shard_of(post_id):
+    return post_id // settings.SITEMAP_SHARD_SIZE
+
+
+def visible_posts():
+    return Post.objects.filter(
+        is_published=True,
+        pub_date__lte=timezone.now(),
+        category_id__in=published_category_ids(),
+    ).order_by('id').values_list('id', 'pub_date')
+
+
+def write_posts(posts, shards=None):
+    # Streams posts in id order and writes one file per shard of
+    # SITEMAP_SHARD_SIZE ids; shards left without posts are removed.
+    root = get_root()
+    written = set()
+    rows = posts.iterator(chunk_size=CHUNK_SIZE)
+    for shard, shard_rows in groupby(rows, key=lambda row: shard_of(row[0])):
+        with AtomicFile(root / POSTS_FILENAME.format(shard)) as sitemap:
+            sitemap.write(URLSET_HEADER)
+            for post_id, pub_date in shard_rows:
+                sitemap.write(url_entry(
+                    reverse('blog:post_detail', args=[post_id]), pub_date
+                ))
+            sitemap.write(URLSET_FOOTER)
+        written.add(shard)
+    stale = shards if shards is not None else {
+        int(path.stem[6:]) for path in root.glob('posts-*.xml')
+    }
+    for shard in set(stale) - written:
+        (root / POSTS_FILENAME.format(shard)).unlink(missing_ok=True)
+    return written
+
+
+def write_categories():
+    categories = Category.objects.filter(is_published=True).order_by('id')
+    with AtomicFile(get_root() / CATEGORIES_FILENAME) as sitemap:
+        sitemap.write(URLSET_HEADER)
+        for slug in categories.values_list('slug', flat=True):
+            sitemap.write(
+                url_entry(reverse('blog:category_posts', args=[slug]))
+            )
+        sitemap.write(URLSET_FOOTER)
+
+
+def write_index():
+    root = get_root()
+    files = sorted(
+        root.glob('posts-*.xml'), key=lambda path: int(path.stem[6:])
+    )
+    files.insert(0, root / CATEGORIES_FILENAME)
+    with AtomicFile(root / INDEX_FILENAME) as index:
+        index.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for path in files:
+            if not path.exists():
+                continue
+            lastmod = timezone.datetime.fromtimestamp(
+                path.stat().st_mtime, tz=timezone.utc
+            )
+            index.write(
+                f'<sitemap><loc>'
+                f'{absolute_url(settings.SITEMAP_URL + path.name)}</loc>'
+                f'<lastmod>{lastmod.isoformat(timespec="seconds")}</lastmod>'
+                f'</sitemap>\n'
+            )
+        index.write('</sitemapindex>\n')
+
+
+def generate_all():
+    now = timezone.now()
+    get_root().mkdir(parents=True, exist_ok=True)
+    publishing.clear_dirty(get_root())
+    write_categories()
+    shards = write_posts(visible_posts())
+    write_index()
+    publishing.mark_swept(get_root(), now)
+    return shards
+
+
+def mark_shard_dirty(*shards):
+    publishing.mark_dirty(get_root(), *shards)
+
+
+def post_shards(posts):
+    return {
+        str(shard) for shard in posts.order_by().annotate(
+            shard=F('id') / settings.SITEMAP_SHARD_SIZE
+        ).values_list('shard', flat=True).distinct()
+    }
+
+
+def mark_category_dirty(category_id):
+    # The category's posts enter or leave the post sitemaps with it.
+    mark_shard_dirty(
+        CATEGORIES_SHARD,
+        *post_shards(Post.objects.filter(category_id=category_id)),
+    )
+
+
+def regenerate_dirty():
+    root = get_root()
+    now = timezone.now()
+    since = publishing.last_swept(root)
+    shards = publishing.take_dirty(root)
+    if since is not None:
+        shards |= post_shards(
+            Post.objects.filter(pub_date__gt=since, pub_date__lte=now)
+        )
+    if not shards:
+        if root.is_dir():
+            publishing.mark_swept(root, now)
+        return shards
+    if CATEGORIES_SHARD in shards:
+        write_categories()
+    for shard in shards - {CATEGORIES_SHARD}:
+        shard = int(shard)
+        size = settings.SITEMAP_SHARD_SIZE
+        write_posts(
+            visible_posts().filter(
+                id__gte=shard * size, id__lt=(shard + 1) * size
+            ),
+            shards={shard},
+        )
+    write_index()
+    publishing.mark_swept(root, now)
+    return shards
@@ -0,0 +1,192 @@
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from .models import ArchiveMonth, AuthorStats, Category, Comment, Follow, Post
+
+POST_STATE_FIELDS = ('author_id', 'category_id', 'is_published', 'pub_date')
+
+
+def get_post_state(post):
+    return {field: getattr(post, field) for field in POST_STATE_FIELDS}
+
+
+def counted_category_id(state):
+    if state is None or not state['is_published']:
+        return None
+    return state['category_id']
+
+
+def move_category_post(old_category_id, new_category_id):
+    if old_category_id == new_category_id:
+        return
+    if old_category_id is not None:
+        Category.objects.filter(pk=old_category_id, posts_count__gt=0).update(
+            posts_count=F('posts_count') - 1
+        )
+    if new_category_id is not None:
+        Category.objects.filter(pk=new_category_id).update(
+            posts_count=F('posts_count') + 1
+        )
+
+
+def archive_bucket(state):
+    category_id = counted_category_id(state)
+    if category_id is None:
+        return None
+    return category_id, timezone.localtime(state['pub_date']).date().replace(
+        day=1
+    )
+
+
+def move_archive_post(old, new):
+    old_bucket, new_bucket = archive_bucket(old), archive_bucket(new)
+    if old_bucket == new_bucket:
+        return
+    if old_bucket is not None:
+        category_id, month = old_bucket
+        ArchiveMonth.objects.filter(
+            category_id=category_id, month=month, posts_count__gt=0
+        ).update(posts_count=F('posts_count') - 1)
+    if new_bucket is not None:
+        category_id, month = new_bucket
+        ArchiveMonth.objects.bulk_create(
+            [ArchiveMonth(category_id=category_id, month=month)],
+            ignore_conflicts=True,
+        )
+        ArchiveMonth.objects.filter(
+            category_id=category_id, month=month
+        ).update(posts_count=F('posts_count') + 1)
+
+
+def recount_archive(category_ids=None):
+    buckets = ArchiveMonth.objects.all()
+    posts = Post.objects.filter(is_published=True, category__isnull=False)
+    if category_ids is not None:
+        buckets = buckets.filter(category_id__in=category_ids)
+        posts = posts.filter(category_id__in=category_ids)
+    rows = posts.annotate(
+        month=TruncMonth('pub_date', output_field=DateField())
+    ).order_by().values('category_id', 'month').annotate(total=Count('pk'))
+    with transaction.atomic():
+        buckets.delete()
+        ArchiveMonth.objects.bulk_create(
+            [
+                ArchiveMonth(
+                    category_id=row['category_id'],
+                    month=row['month'],
+                    posts_count=row['total'],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+def _count_subquery(queryset, outer_field):
+    return Coalesce(Subquery(
+        queryset.filter(**{outer_field: OuterRef('pk')}).order_by().values(
+            outer_field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount_category_posts(category_ids=None):
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    categories.update(posts_count=_count_subquery(
+        Post.objects.filter(is_published=True), 'category_id'
+    ))
+
+
+def recount_author_stats(author_ids):
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id) for author_id in author_ids],
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.filter(author_id__in=author_ids).update(
+        posts_count=_count_subquery(Post.objects.all(), 'author_id'),
+        published_count=_count_subquery(
+            Post.objects.filter(is_published=True), 'author_id'
+        ),
+        comments_received=_count_subquery(
+            Comment.objects.all(), 'post__author_id'
+        ),
+        last_post_date=Subquery(
+            Post.objects.filter(
+                author_id=OuterRef('pk'), is_published=True
+            ).order_by().values('author_id').annotate(
+                last=Max('pub_date')
+            ).values('last')
+        ),
+        followers_count=_count_subquery(Follow.objects.all(), 'author_id'),
+    )
+
+
+def get_author_stats(author_id):
+    stats = AuthorStats.objects.filter(author_id=author_id).first()
+    if stats is None:
+        recount_author_stats([author_id])
+        stats = AuthorStats.objects.get(author_id=author_id)
+    return stats
+
+
+def change_author_stats(author_id, **deltas):
+    changes = {
+        field: F(field) + delta for field, delta in deltas.items() if delta
+    }
+    if not changes or AuthorStats.objects.filter(
+        author_id=author_id
+    ).update(**changes):
+        return
+    # Only gains rebuild a missing row: losses come from deletes, which may
+    # be cascading from the author, whose row can already be gone.
+    # get_author_stats() recounts a missing row when it is read anyway.
+    if all(delta > 0 for delta in deltas.values() if delta):
+        recount_author_stats([author_id])
+
+
+def move_author_post(old, new):
+    # old/new are post states (None for a created/deleted post).
+    if old is not None and new is not None and (
+        old['author_id'] != new['author_id']
+    ):
+        move_author_post(old, None)
+        move_author_post(None, new)
+        return
+    author_id = (new or old)['author_id']
+    posts_delta = (new is not None) - (old is not None)
+    published_delta = (
+        bool(new and new['is_published']) - bool(old and old['is_published'])
+    )
+    change_author_stats(
+        author_id,
+        posts_count=posts_delta,
+        published_count=published_delta,
+    )
+    was_published = old is not None and old['is_published']
+    if new is not None and new['is_published'] and not was_published:
+        AuthorStats.objects.filter(author_id=author_id).update(
+            last_post_date=Greatest(
+                Coalesce(F('last_post_date'), new['pub_date']),
+                new['pub_date'],
+            )
+        )
+    elif was_published and new != old:
+        AuthorStats.objects.filter(author_id=author_id).update(
+            last_post_date=Subquery(
+                Post.objects.filter(
+                    author_id=author_id, is_published=True
+                ).order_by('-pub_date').values('pub_date')[:1]
+            )
+        )
+
+
+def move_received_comment(post_id, delta):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is not None:
+        change_author_stats(author_id, comments_received=delta)
@@ -0,0 +1,20 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.page_cache import fragment_context, is_shared_render, placeholder
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, template_name, **arguments):
+    # Renders a per-user fragment, or only its placeholder while the page
+    # body shared by all users is rendered for blog.page_cache.
+    if is_shared_render(context.get('request')):
+        return mark_safe(placeholder(template_name, arguments))
+    fragment = context.template.engine.get_template(template_name)
+    arguments.update(
+        fragment_context(context['request'], template_name, arguments)
+    )
+    with context.push(**arguments):
+        return fragment.render(context)
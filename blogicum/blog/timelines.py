@@ -0,0 +1,224 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import published_category_ids
+from .models import AuthorStats, Category, Follow, Post, TimelineEntry
+from .paginators import CursorPage, CursorPaginator
+from .stats import change_author_stats
+
+TIMELINE_ORDERING = ('pub_date', 'post_id')
+ENTRY_BATCH_SIZE = 1000
+
+
+def is_popular(followers_count):
+    return followers_count > settings.TIMELINE['FANOUT_LIMIT']
+
+
+def source_posts(follow):
+    # Follow and Post share the author_id/category_id names, so the same Q
+    # selects a source's follows and its posts.
+    if follow.author_id is not None:
+        return Q(author_id=follow.author_id)
+    return Q(category_id=follow.category_id)
+
+
+def add_entries(user_ids, posts):
+    # posts are (post id, pub_date) pairs.
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in user_ids for post_id, pub_date in posts
+        ],
+        batch_size=ENTRY_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def withdraw(post_ids):
+    TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+
+
+def fan_out(post_id):
+    # Copies a published post into its followers' timelines; an entry of a
+    # post scheduled for later stays hidden until its pub_date. Followers
+    # of popular sources pull their posts at read time instead.
+    post = Post.objects.filter(pk=post_id, is_published=True).values(
+        'author_id', 'category_id', 'pub_date'
+    ).first()
+    if post is None:
+        return
+    sources = []
+    if not is_popular(AuthorStats.objects.filter(
+        author_id=post['author_id']
+    ).values_list('followers_count', flat=True).first() or 0):
+        sources.append(Q(author_id=post['author_id']))
+    if post['category_id'] is not None and not is_popular(
+        Category.objects.filter(pk=post['category_id']).values_list(
+            'followers_count', flat=True
+        ).first() or 0
+    ):
+        sources.append(Q(category_id=post['category_id']))
+    if sources:
+        followers = Follow.objects.filter(reduce(or_, sources)).values_list(
+            'follower_id', flat=True
+        ).distinct()
+        add_entries(followers, [(post_id, post['pub_date'])])
+
+
+def update_timelines(post_id, old, new):
+    # old/new are post states as in blog.stats (None for a created post).
+    published = new is not None and new['is_published']
+    was_published = old is not None and old['is_published']
+    if was_published and published and (
+        old['author_id'] == new['author_id']
+        and old['category_id'] == new['category_id']
+    ):
+        if old['pub_date'] != new['pub_date']:
+            TimelineEntry.objects.filter(post_id=post_id).update(
+                pub_date=new['pub_date']
+            )
+        return
+    if was_published:
+        withdraw([post_id])
+    if published:
+        fan_out(post_id)
+
+
+def refresh_timelines(post_ids):
+    # For batch updates that bypass the post signals.
+    withdraw(post_ids)
+    for post_id in Post.objects.filter(
+        pk__in=post_ids, is_published=True
+    ).values_list('pk', flat=True):
+        fan_out(post_id)
+
+
+def backfill(user_ids, posts):
+    add_entries(user_ids, list(
+        Post.objects.filter(posts, is_published=True).order_by(
+            '-pub_date'
+        ).values_list('pk', 'pub_date')[:settings.TIMELINE['BACKFILL']]
+    ))
+
+
+def followers_count(follow):
+    if follow.author_id is not None:
+        return AuthorStats.objects.filter(
+            author_id=follow.author_id
+        ).values_list('followers_count', flat=True).first()
+    return Category.objects.filter(pk=follow.category_id).values_list(
+        'followers_count', flat=True
+    ).first()
+
+
+def follow_added(follow):
+    if follow.author_id is not None:
+        change_author_stats(follow.author_id, followers_count=1)
+    else:
+        Category.objects.filter(pk=follow.category_id).update(
+            followers_count=F('followers_count') + 1
+        )
+    if not is_popular(followers_count(follow) or 0):
+        backfill([follow.follower_id], source_posts(follow))
+
+
+def follow_removed(follow):
+    # No recount here: the author or category may be being deleted.
+    if follow.author_id is not None:
+        AuthorStats.objects.filter(
+            author_id=follow.author_id, followers_count__gt=0
+        ).update(followers_count=F('followers_count') - 1)
+    else:
+        Category.objects.filter(
+            pk=follow.category_id, followers_count__gt=0
+        ).update(followers_count=F('followers_count') - 1)
+    # Posts the follower still gets through another follow stay.
+    follows = Follow.objects.filter(follower_id=follow.follower_id)
+    TimelineEntry.objects.filter(
+        user_id=follow.follower_id,
+        post__in=Post.objects.filter(source_posts(follow)),
+    ).exclude(
+        post__author_id__in=follows.filter(
+            author__isnull=False
+        ).values('author_id')
+    ).exclude(
+        post__category_id__in=follows.filter(
+            category__isnull=False
+        ).values('category_id')
+    ).delete()
+    if followers_count(follow) == settings.TIMELINE['FANOUT_LIMIT']:
+        # The source is no longer popular: its posts are fanned out again.
+        backfill(
+            Follow.objects.filter(source_posts(follow)).values_list(
+                'follower_id', flat=True
+            ),
+            source_posts(follow),
+        )
+
+
+def is_following(user, kind, target):
+    if not user.is_authenticated:
+        return False
+    if kind == 'author':
+        follows = Follow.objects.filter(author__username=target)
+    else:
+        follows = Follow.objects.filter(category__slug=target)
+    return follows.filter(follower_id=user.pk).exists()
+
+
+def pulled_sources(user):
+    limit = settings.TIMELINE['FANOUT_LIMIT']
+    return [
+        source_posts(follow) for follow in Follow.objects.filter(
+            Q(author__post_stats__followers_count__gt=limit)
+            | Q(category__followers_count__gt=limit),
+            follower_id=user.pk,
+        ).only('author_id', 'category_id')
+    ]
+
+
+def timeline_page(user, cursor, per_page):
+    # Merges the stored timeline with the posts of the popular authors and
+    # categories the user follows. Both are read newest first from the
+    # cursor on, so a page costs two range scans however many sources are
+    # followed. The page lists post ids.
+    paginator = CursorPaginator(
+        TimelineEntry.objects.none(), per_page, TIMELINE_ORDERING
+    )
+    values = paginator.decode(cursor) if cursor else None
+    now = timezone.now()
+    category_ids = published_category_ids()
+    sources = [TimelineEntry.objects.filter(
+        user_id=user.pk,
+        pub_date__lte=now,
+        post__is_published=True,
+        post__category_id__in=category_ids,
+    )]
+    pulled = pulled_sources(user)
+    if pulled:
+        sources.append(Post.objects.filter(
+            reduce(or_, pulled),
+            pub_date__lte=now,
+            is_published=True,
+            category_id__in=category_ids,
+        ).annotate(post_id=F('pk')))
+    rows = set()
+    for source in sources:
+        source = source.order_by('-pub_date', '-post_id')
+        if values is not None:
+            source = source.filter(paginator.after(values))
+        rows.update(source.values_list(*TIMELINE_ORDERING)[:per_page + 1])
+    rows = sorted(rows, reverse=True)
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = paginator.encode_values(rows[-1])
+    return CursorPage(
+        [post_id for _, post_id in rows],
+        cursor if values is not None else None,
+        next_cursor,
+    )
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Post, PostScore
+
+SCORE_BATCH_SIZE = 500
+
+
+def add_scores(weights):
+    # weights maps post ids to score deltas; per batch one INSERT for
+    # missing rows and one UPDATE, scores never drop below zero.
+    items = [(pk, weight) for pk, weight in weights.items() if weight]
+    for start in range(0, len(items), SCORE_BATCH_SIZE):
+        batch = items[start:start + SCORE_BATCH_SIZE]
+        ids = [pk for pk, _ in batch]
+        # Only gains create rows: a comment deleted along with its post must
+        # not insert a score row the post's deletion does not know about.
+        gains = [pk for pk, weight in batch if weight > 0]
+        PostScore.objects.bulk_create(
+            [
+                PostScore(post_id=pk) for pk in Post.objects.filter(
+                    pk__in=gains
+                ).values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        delta = Case(
+            *[When(post_id=pk, then=Value(weight)) for pk, weight in batch],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        PostScore.objects.filter(post_id__in=ids).update(
+            score=Greatest(F('score') + delta, Value(0.0))
+        )
+
+
+def add_comment_score(post_id, sign=1):
+    add_comment_scores({post_id: sign})
+
+
+def add_comment_scores(comments):
+    # comments maps post ids to changes in their published comment counts.
+    weight = settings.TRENDING['COMMENT_WEIGHT']
+    add_scores({pk: count * weight for pk, count in comments.items()})
+
+
+def add_view_scores(views):
+    weight = settings.TRENDING['VIEW_WEIGHT']
+    add_scores({pk: count * weight for pk, count in views.items()})
+
+
+def decay_scores(elapsed):
+    # Run every TRENDING['DECAY_INTERVAL'] seconds: scores halve every
+    # HALF_LIFE seconds and rows that faded out are dropped.
+    factor = 0.5 ** (elapsed / settings.TRENDING['HALF_LIFE'])
+    PostScore.objects.update(score=F('score') * factor)
+    return PostScore.objects.filter(
+        score__lt=settings.TRENDING['MIN_SCORE']
+    ).delete()[0]
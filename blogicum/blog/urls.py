@@ -2,18 +2,63 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('timeline/', views.timeline, name='timeline'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/view/',
+        views.count_view,
+        name='count_view'
+    ),
+    path('archive/', views.archive, name='archive'),
+    path('archive/<int:year>/', views.archive, name='archive_year'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive,
+        name='archive_month'
+    ),
+    path('category/', views.category_list, name='category_list'),
     path(
         'category/<slug:category_slug>/',
         views.category_posts,
         name='category_posts'
     ),
+    path(
+        'category/<slug:category_slug>/archive/',
+        views.archive,
+        name='category_archive'
+    ),
+    path(
+        'category/<slug:category_slug>/archive/<int:year>/',
+        views.archive,
+        name='category_archive_year'
+    ),
+    path(
+        'category/<slug:category_slug>/archive/<int:year>/<int:month>/',
+        views.archive,
+        name='category_archive_month'
+    ),
+    path(
+        'category/<slug:category_slug>/follow/',
+        views.follow_category,
+        name='follow_category'
+    ),
+    path(
+        'category/<slug:category_slug>/unfollow/',
+        views.unfollow_category,
+        name='unfollow_category'
+    ),
+    path(
+        'locations/autocomplete/',
+        views.location_autocomplete,
+        name='location_autocomplete'
+    ),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path(
         'posts/<int:post_id>/edit/',
@@ -36,9 +81,32 @@ urlpatterns = [
         views.delete_comment,
         name='delete_comment'
     ),
+    path('feeds/<str:feed_format>/', feeds.latest_posts, name='feed'),
+    path(
+        'feeds/category/<slug:category_slug>/<str:feed_format>/',
+        feeds.category_posts,
+        name='category_feed'
+    ),
+    path(
+        'feeds/author/<str:username>/<str:feed_format>/',
+        feeds.author_posts,
+        name='author_feed'
+    ),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+    path(
+        'profile/<str:username>/follow/',
+        views.follow_author,
+        name='follow_author'
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.unfollow_author,
+        name='unfollow_author'
+    ),
     path(
         'profile/<str:username>/',
         views.UserProfileDetailView.as_view(),
         name='profile'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) + static(
+    settings.SITEMAP_URL, document_root=settings.SITEMAP_ROOT
+)
@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    F,
+    PositiveBigIntegerField,
+    Value,
+    When,
+)
+
+from .models import Post
+from .trending import add_view_scores
+
+FLUSH_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = time.monotonic()
+
+
+def record_view(post_id):
+    with _lock:
+        _pending[post_id] = _pending.get(post_id, 0) + 1
+    try:
+        flush()
+    except Exception:
+        # flush() has queued the views again for the next request; the
+        # page itself has been served and must not fail.
+        logger.exception('Could not flush view counts')
+
+
+def pending_views(post_id):
+    return _pending.get(post_id, 0)
+
+
+def add_pending_views(posts):
+    # Live counts are the stored value plus this process's unflushed views;
+    # other workers' buffers show up after their next flush.
+    for post in posts:
+        post.views_count += pending_views(post.id)
+    return posts
+
+
+def flush(force=False):
+    # Views are buffered per process and written at most once per
+    # VIEW_COUNT_FLUSH_INTERVAL seconds, one UPDATE per batch of posts.
+    global _last_flush
+    now = time.monotonic()
+    with _lock:
+        if not _pending or (
+            not force
+            and now - _last_flush < settings.VIEW_COUNT_FLUSH_INTERVAL
+        ):
+            return
+        _last_flush = now
+        pending = _pending.copy()
+        _pending.clear()
+    items = list(pending.items())
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        batch = items[start:start + FLUSH_BATCH_SIZE]
+        try:
+            Post.objects.filter(pk__in=[pk for pk, _ in batch]).update(
+                views_count=F('views_count') + Case(
+                    *[When(pk=pk, then=Value(views)) for pk, views in batch],
+                    default=Value(0),
+                    output_field=PositiveBigIntegerField(),
+                )
+            )
+            add_view_scores(dict(batch))
+        except Exception:
+            with _lock:
+                for pk, views in items[start:]:
+                    _pending[pk] = _pending.get(pk, 0) + views
+            raise
+
+
+def count_post_view(view):
+    # Wraps the page cache too, so cached hits are counted as well.
+    @wraps(view)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view(request, post_id, *args, **kwargs)
+        if (
+                request.method == 'GET'
+                and response.status_code == 200
+                and not getattr(request, 'prerendering', False)
+        ):
+            record_view(post_id)
+        return response
+    return wrapper
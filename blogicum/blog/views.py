@@ -1,119 +1,315 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.http import HttpResponseNotFound
+from django.db.models import Count, Q
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotFound,
+    JsonResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator, EmptyPage
 from django.urls import reverse_lazy
 from django.views.generic import DetailView
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.views.generic.edit import CreateView
 from django.contrib.auth.forms import UserChangeForm
 
+from .archive import archive_months, archive_range, archive_years, month_start
+from .caching import (
+    attach_published_categories,
+    get_published_category,
+    search_published_locations,
+)
+from .deletion import schedule_post_deletion
 from .forms import PostForm, CommentForm
-from .models import Post, Category, Comment
+from .moderation import delete_comments
+from .models import EDIT_DEFERRED_FIELDS, Post, Category, Comment, Follow
+from .page_cache import cache_shared_page, private_page
+from .paginators import (
+    BlogPaginator,
+    CountedPaginator,
+    CursorPaginator,
+    EstimatedCountPaginator,
+    NoCountPaginator,
+)
+from .stats import POST_STATE_FIELDS, get_author_stats
+from .timelines import timeline_page
+from .view_counts import add_pending_views, count_post_view, record_view
+from .visibility import get_queryset, is_post_visible
 
 DEFAULT_POSTS_COUNT = 5
 POSTS_PER_PAGE = 10
-
-
-def get_queryset(query):
-    return query.select_related(
-        'category',
-        'location',
-        'author'
-    ).filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True,
+FEED_DEFERRED_FIELDS = ('text', 'content')
+INDEX_COUNT_CACHE_KEY = 'blog:index:count'
+LOCATION_SUGGESTIONS = 20
+PUBLISHED_COMMENTS_COUNT = Count(
+    'comments', filter=Q(comments__is_published=True)
+)
+LOCATION_QUERY_LENGTH = 100
+RELATED_DEFERRED_FIELDS = ('text', 'content', 'excerpt')
+
+
+def paginate_feed(request, paginator):
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = add_pending_views(
+        attach_published_categories(page_obj.object_list)
     )
+    return page_obj
+
+
+def get_index_paginator(posts):
+    mode = settings.INDEX_PAGINATION
+    if mode == 'none':
+        return NoCountPaginator(posts, POSTS_PER_PAGE)
+    if mode == 'estimate':
+        return EstimatedCountPaginator(
+            posts,
+            POSTS_PER_PAGE,
+            cache_key=INDEX_COUNT_CACHE_KEY,
+            timeout=settings.INDEX_COUNT_TIMEOUT,
+        )
+    return BlogPaginator(posts, POSTS_PER_PAGE)
 
 
+@cache_shared_page
 def index(request):
     template = 'blog/index.html'
     all_posts = get_queryset(
         Post.objects.annotate(
-            comment_count=Count('comments')
+            comment_count=PUBLISHED_COMMENTS_COUNT
         ).order_by('-pub_date')
-    )
-
-    paginator = Paginator(all_posts, POSTS_PER_PAGE)
-    page = request.GET.get('page', 1)
-
-    try:
-        page_obj = paginator.page(page)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    ).defer(*FEED_DEFERRED_FIELDS)
 
     context = {
-        'page_obj': page_obj,
+        'page_obj': paginate_feed(request, get_index_paginator(all_posts)),
     }
 
     return render(request, template, context)
 
 
+@cache_shared_page
+def popular(request):
+    template = 'blog/popular.html'
+    posts = get_queryset(
+        Post.objects.filter(score__isnull=False).select_related(
+            'score'
+        ).annotate(comment_count=PUBLISHED_COMMENTS_COUNT)
+    ).defer(*FEED_DEFERRED_FIELDS)
+    page_obj = CursorPaginator(
+        posts, POSTS_PER_PAGE, ordering=('score__score', 'id')
+    ).get_page(request.GET.get('cursor'))
+    page_obj.object_list = add_pending_views(
+        attach_published_categories(page_obj.object_list)
+    )
+    return render(request, template, {'page_obj': page_obj})
+
+
+@login_required
+def timeline(request):
+    template = 'blog/timeline.html'
+    page_obj = timeline_page(
+        request.user, request.GET.get('cursor'), POSTS_PER_PAGE
+    )
+    posts = get_queryset(
+        Post.objects.filter(pk__in=page_obj.object_list).annotate(
+            comment_count=PUBLISHED_COMMENTS_COUNT
+        ).order_by('-pub_date', '-id')
+    ).defer(*FEED_DEFERRED_FIELDS)
+    page_obj.object_list = add_pending_views(
+        attach_published_categories(posts)
+    )
+    return render(request, template, {'page_obj': page_obj})
+
+
+@require_POST
+@login_required
+def follow_author(request, username):
+    author = get_object_or_404(User, username=username)
+    if author.pk != request.user.pk:
+        Follow.objects.get_or_create(follower=request.user, author=author)
+    return redirect('blog:profile', username=username)
+
+
+@require_POST
+@login_required
+def unfollow_author(request, username):
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(follower=request.user, author=author).delete()
+    return redirect('blog:profile', username=username)
+
+
+@require_POST
+@login_required
+def follow_category(request, category_slug):
+    category = get_published_category(category_slug)
+    if category is None:
+        raise Http404
+    Follow.objects.get_or_create(follower=request.user, category=category)
+    return redirect('blog:category_posts', category_slug=category_slug)
+
+
+@require_POST
+@login_required
+def unfollow_category(request, category_slug):
+    Follow.objects.filter(
+        follower=request.user, category__slug=category_slug
+    ).delete()
+    return redirect('blog:category_posts', category_slug=category_slug)
+
+
+@count_post_view
+@cache_shared_page
 def post_detail(request, post_id):
     template = 'blog/detail.html'
     post = get_object_or_404(Post, pk=post_id)
-    comments = Comment.objects.filter(post=post)
+    comments = Comment.objects.filter(post=post, is_published=True)
     form = CommentForm()
 
-    if post.author != request.user and (
+    if (
             not post.is_published
             or not post.category.is_published
             or post.pub_date > timezone.now()
     ):
-        return HttpResponseNotFound(render(request, 'pages/404.html'))
-
+        if post.pending_deletion or post.author != request.user:
+            return HttpResponseNotFound(render(request, 'pages/404.html'))
+        private_page(request)
+
+    add_pending_views([post])
+    related_posts = get_queryset(
+        Post.objects.filter(related_to__post_id=post.id)
+    ).order_by('-related_to__score').defer(*RELATED_DEFERRED_FIELDS)
     context = {
         'post': post,
         'comments': comments,
         'form': form,
+        'related_posts': related_posts,
     }
     return render(request, template, context)
 
 
-def category_posts(request, category_slug):
-    template = 'blog/category.html'
-    category = get_object_or_404(Category, slug=category_slug,
-                                 is_published=True)
-    posts = get_queryset(category.posts)
+@csrf_exempt
+@require_POST
+def count_view(request, post_id):
+    # Sent by prerendered post pages, which the proxy serves without
+    # reaching post_detail; the view goes through the same buffer.
+    if not is_post_visible(post_id, request.user):
+        raise Http404
+    record_view(post_id)
+    return HttpResponse(status=204)
 
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page = request.GET.get('page', 1)
 
-    try:
-        page_obj = paginator.page(page)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+@cache_shared_page
+def category_posts(request, category_slug):
+    template = 'blog/category.html'
+    category = get_published_category(category_slug)
+    if category is None:
+        raise Http404
+    posts = get_queryset(
+        Post.objects.filter(category_id=category.id).annotate(
+            comment_count=PUBLISHED_COMMENTS_COUNT
+        ).order_by('-pub_date')
+    ).defer(*FEED_DEFERRED_FIELDS)
 
     context = {
         'category': category,
-        'page_obj': page_obj,
+        'page_obj': paginate_feed(
+            request, BlogPaginator(posts, POSTS_PER_PAGE)
+        ),
     }
 
     return render(request, template, context)
 
 
+@cache_shared_page
+def archive(request, year=None, month=None, category_slug=None):
+    template = 'blog/archive.html'
+    category = None
+    posts = get_queryset(Post.objects.all())
+    if category_slug is not None:
+        category = get_published_category(category_slug)
+        if category is None:
+            raise Http404
+        posts = posts.filter(category_id=category.id)
+    months = archive_months(posts, category and category.id)
+    context = {'category': category, 'years': archive_years(months)}
+    if year is not None:
+        try:
+            start, end = archive_range(year, month)
+        except ValueError:
+            raise Http404
+        posts = posts.filter(
+            pub_date__gte=month_start(start), pub_date__lt=month_start(end)
+        ).annotate(
+            comment_count=PUBLISHED_COMMENTS_COUNT
+        ).order_by('-pub_date').defer(*FEED_DEFERRED_FIELDS)
+        # The total comes from the month buckets already loaded for the
+        # navigation, so the listing costs no COUNT(*).
+        count = sum(total for first, total in months if start <= first < end)
+        context.update(
+            year=year,
+            month=start if month else None,
+            months=[item for item in months if item[0].year == year],
+            page_obj=paginate_feed(
+                request, CountedPaginator(posts, POSTS_PER_PAGE, count=count)
+            ),
+        )
+    return render(request, template, context)
+
+
+def category_list(request):
+    template = 'blog/category_list.html'
+    # The stored counts include scheduled posts; the few still to come are
+    # counted over the pub_date index and left out for visitors.
+    scheduled = dict(Post.objects.filter(
+        is_published=True, pub_date__gt=timezone.now()
+    ).order_by().values('category_id').annotate(
+        total=Count('pk')
+    ).values_list('category_id', 'total'))
+    categories = list(Category.objects.filter(is_published=True))
+    for category in categories:
+        category.posts_count -= scheduled.get(category.id, 0)
+    categories.sort(
+        key=lambda category: (-category.posts_count, category.title)
+    )
+    return render(request, template, {'categories': categories})
+
+
 class UserProfileDetailView(DetailView):
     template_name = 'blog/profile.html'
 
     def get(self, request, username):
         user = get_object_or_404(User, username=username)
+        stats = get_author_stats(user.pk)
         posts = Post.objects.filter(author=user).annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
-
-        paginator = Paginator(posts, POSTS_PER_PAGE)
-        page = request.GET.get('page', 1)
-
-        try:
-            page_obj = paginator.page(page)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
+            comment_count=PUBLISHED_COMMENTS_COUNT
+        ).order_by('-pub_date').defer(*FEED_DEFERRED_FIELDS)
+
+        # The stored stats include scheduled posts, so visitors are shown
+        # the count of posts they can see and no date of the last one.
+        is_owner = request.user.id == user.id
+        if is_owner:
+            posts = posts.select_related('category', 'location')
+            page_obj = CountedPaginator(
+                posts, POSTS_PER_PAGE, count=stats.posts_count
+            ).get_page(request.GET.get('page'))
+            page_obj.object_list = add_pending_views(
+                list(page_obj.object_list)
+            )
+        else:
+            page_obj = paginate_feed(
+                request, BlogPaginator(get_queryset(posts), POSTS_PER_PAGE)
+            )
+        for post in page_obj.object_list:
+            post.author = user
 
         context = {
             'profile': user,
+            'is_owner': is_owner,
+            'stats': stats,
             'page_obj': page_obj,
         }
         return render(request, self.template_name, context)
@@ -149,9 +345,13 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
 @login_required
 def edit_post(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.defer(*EDIT_DEFERRED_FIELDS),
+        pk=post_id,
+        pending_deletion=False,
+    )
 
-    if request.user == post.author:
+    if request.user.id == post.author_id:
         if request.method == 'POST' or request.user.has_perm(
                 'blog.change_post'):
             form = PostForm(request.POST, instance=post)
@@ -172,10 +372,12 @@ def edit_post(request, post_id):
 
 @login_required
 def delete_post(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.only(*POST_STATE_FIELDS), pk=post_id
+    )
 
-    if request.user == post.author:
-        post.delete()
+    if request.user.id == post.author_id:
+        schedule_post_deletion(post)
         return redirect('blog:profile', username=request.user.username)
     else:
         return redirect('blog:post_detail', post_id=post_id)
@@ -183,12 +385,13 @@ def delete_post(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if not is_post_visible(post_id, request.user):
+        raise Http404
 
     form = CommentForm(request.POST)
     if form.is_valid():
         comment = form.save(commit=False)
-        comment.post = post
+        comment.post_id = post_id
         comment.author = request.user
         comment.save()
     return redirect('blog:post_detail', post_id=post_id)
@@ -196,9 +399,9 @@ def add_comment(request, post_id):
 
 @login_required
 def edit_comment(request, post_id, comment_id):
-    comment = get_object_or_404(Comment, pk=comment_id)
+    comment = get_object_or_404(Comment, pk=comment_id, post_id=post_id)
 
-    if request.user.is_authenticated and request.user == comment.author:
+    if request.user.id == comment.author_id:
         if request.method == 'POST':
             form = CommentForm(request.POST, instance=comment)
             if form.is_valid():
@@ -217,13 +420,24 @@ def edit_comment(request, post_id, comment_id):
 
 @login_required
 def delete_comment(request, post_id, comment_id):
-    comment = get_object_or_404(Comment, pk=comment_id)
+    comments = Comment.objects.filter(post_id=post_id)
+    if request.method == 'POST':
+        comments = comments.only('author_id', 'post_id')
+    comment = get_object_or_404(comments, pk=comment_id)
 
-    if request.user.is_authenticated and request.user == comment.author:
+    if request.user.id == comment.author_id:
         if request.method == 'POST':
-            comment.delete()
+            delete_comments(Comment.objects.filter(pk=comment.pk))
             return redirect('blog:post_detail', post_id=post_id)
         else:
             return render(request, 'blog/comment.html', {'comment': comment})
     else:
         return HttpResponseNotFound(render(request, 'pages/404.html'))
+
+
+@login_required
+def location_autocomplete(request):
+    term = request.GET.get('q', '').strip()[:LOCATION_QUERY_LENGTH]
+    return JsonResponse({
+        'results': search_published_locations(term, LOCATION_SUGGESTIONS),
+    })
@@ -0,0 +1,29 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import published_category_ids
+from .models import Post
+
+
+def get_queryset(query):
+    return query.select_related(
+        'location',
+        'author'
+    ).filter(
+        pub_date__lte=timezone.now(),
+        is_published=True,
+        category_id__in=published_category_ids(),
+        pending_deletion=False,
+    )
+
+
+def is_post_visible(post_id, user):
+    return Post.objects.filter(
+        Q(author_id=user.id) | Q(
+            pub_date__lte=timezone.now(),
+            is_published=True,
+            category_id__in=published_category_ids(),
+        ),
+        pk=post_id,
+        pending_deletion=False,
+    ).exists()
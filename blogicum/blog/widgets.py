@@ -0,0 +1,27 @@
+from django import forms
+from django.urls import reverse_lazy
+
+from .models import Location
+
+
+class LocationAutocompleteWidget(forms.Select):
+    # Renders only the selected location; the rest are looked up through
+    # blog:location_autocomplete as the user types.
+    class Media:
+        js = ('js/location_autocomplete.js',)
+
+    def __init__(self, attrs=None):
+        url = reverse_lazy('blog:location_autocomplete')
+        super().__init__({'data-autocomplete-url': url, **(attrs or {})})
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        selected = [pk for pk in value if str(pk).isdigit()]
+        self.choices = [('', choices.field.empty_label)] + [
+            (location.pk, str(location))
+            for location in Location.objects.filter(pk__in=selected)
+        ]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
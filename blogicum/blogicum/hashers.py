@@ -0,0 +1,98 @@
+import base64
+import hashlib
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BasePasswordHasher,
+    mask_hash,
+    must_update_salt,
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.encoding import force_bytes
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    # Memory-hard hasher built on hashlib.scrypt; the same encoding as the
+    # hasher shipped with Django 4.0, so hashes survive an upgrade.
+    algorithm = 'scrypt'
+    block_size = 8
+    maxmem = 0
+    parallelism = 1
+    work_factor = 2 ** 14
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            force_bytes(password),
+            salt=force_bytes(salt),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=self.maxmem,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+    def decode(self, encoded):
+        algorithm, work_factor, salt, block_size, parallelism, hash_ = (
+            encoded.split('$', 6)
+        )
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(work_factor),
+            'salt': salt,
+            'block_size': int(block_size),
+            'parallelism': int(parallelism),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password,
+            decoded['salt'],
+            decoded['work_factor'],
+            decoded['block_size'],
+            decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor
+            or decoded['block_size'] != self.block_size
+            or decoded['parallelism'] != self.parallelism
+            or must_update_salt(decoded['salt'], self.salt_entropy)
+        )
+
+    def harden_runtime(self, password, encoded):
+        # The runtime for scrypt is too long for this to be worth it.
+        pass
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    # 64 MiB and two lanes: well above the OWASP minimum for argon2id while
+    # leaving room for several concurrent logins per worker. Requires the
+    # argon2-cffi package.
+    time_cost = 2
+    memory_cost = 65536
+    parallelism = 2
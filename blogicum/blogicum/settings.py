@@ -30,6 +30,7 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     'pages.apps.PagesConfig',
     'blog.apps.BlogConfig',
+    'monitoring.apps.MonitoringConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -40,13 +41,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ServerTimingMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'monitoring.middleware.SqlProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.middleware.ViewTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -55,7 +61,7 @@ TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'monitoring.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,6 +87,144 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.InstrumentedLocMemCache',
+        'LOCATION': 'blogicum',
+    }
+}
+
+# Sessions are stored in the database. With SESSION_CACHE_ALIAS naming a
+# cache shared by all worker processes (memcached, Redis, database) they are
+# read from it and written through; a per-process cache would keep a logged
+# out session alive on the other workers. 'signed_cookies' avoids the store
+# entirely at the cost of larger cookies.
+
+SESSION_CACHE_ALIAS = None
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + (
+    'cached_db' if SESSION_CACHE_ALIAS else 'db'
+)
+
+# Published categories are kept in process memory; saving or deleting a
+# category clears the local copy, other workers refresh after this timeout.
+CATEGORY_CACHE_TIMEOUT = 60
+
+# Location autocomplete results in the shared cache; any location change
+# drops them all.
+LOCATION_SEARCH_CACHE_TIMEOUT = 600
+
+# Index feed pagination: 'exact' counts on every request, 'estimate' reuses
+# a count cached for INDEX_COUNT_TIMEOUT seconds, 'none' never counts and
+# only links to neighbouring pages.
+INDEX_PAGINATION = 'estimate'
+INDEX_COUNT_TIMEOUT = 300
+
+# Post views are buffered in each worker and written in one batched UPDATE
+# by the first view after this many seconds; views still buffered when a
+# worker stops are lost. Prerendered post pages count their views with a
+# beacon to blog:count_view.
+VIEW_COUNT_FLUSH_INTERVAL = 10
+
+# Popular feed: published comments and views add to a post's score, which
+# `manage.py decay_trending` (run every DECAY_INTERVAL seconds) halves every
+# HALF_LIFE seconds; scores under MIN_SCORE are dropped.
+TRENDING = {
+    'COMMENT_WEIGHT': 5.0,
+    'VIEW_WEIGHT': 1.0,
+    'HALF_LIFE': 24 * 60 * 60,
+    'DECAY_INTERVAL': 60 * 60,
+    'MIN_SCORE': 0.01,
+}
+
+# New posts are copied into the timelines of their author's and category's
+# followers when published; authors and categories with more than
+# FANOUT_LIMIT followers are read at request time instead. A new follow
+# brings the source's last BACKFILL posts into the timeline.
+TIMELINE = {
+    'FANOUT_LIMIT': 1000,
+    'BACKFILL': 50,
+}
+
+# Related posts: `manage.py update_related_posts` compares new and edited
+# posts with all others by the MinHash of their words, BATCH_SIZE posts at
+# a time with NumPy, and keeps the COUNT most
+# similar ones scoring at least MIN_SCORE.
+RELATED_POSTS = {
+    'COUNT': 5,
+    'MIN_SCORE': 0.1,
+    'BATCH_SIZE': 200,
+}
+
+# Users and posts with many comments are hidden at once and deleted in
+# batches of this size by `manage.py process_deletions`.
+DELETION_BATCH_SIZE = 500
+
+# Admin changelists reuse the row count of the same filtered query for this
+# many seconds.
+ADMIN_COUNT_TIMEOUT = 60
+
+# Rendered RSS/Atom feeds are stored in FEED_ROOT, shared by all worker
+# processes. A post change renders the feeds it appears in again once it is
+# committed and retires the others; a stored feed is also rendered again
+# when its next scheduled post is due or after FEED_CACHE_TIMEOUT seconds.
+FEED_ROOT = BASE_DIR / 'feeds'
+FEED_CACHE_TIMEOUT = 3600
+
+# Session users are cached in USER_CACHE for USER_CACHE_TIMEOUT seconds and
+# dropped when saved, deleted or logged out. The cache must be shared by all
+# worker processes (memcached, Redis, database): with a per-process cache
+# other workers would keep serving a deactivated user. None disables it.
+
+AUTHENTICATION_BACKENDS = ['blog.backends.CachedModelBackend']
+USER_CACHE = None
+USER_CACHE_TIMEOUT = 300
+
+# Write throttling, see blog.middleware.RateLimitMiddleware.
+# Limits are fixed windows keyed by URL name, applied to non-GET requests
+# per user and per client IP ('N/s', 'N/m', 'N/h' or 'N/d'). Point
+# RATE_LIMIT_CACHE at a memcached cache to share the counts between worker
+# processes: its incr() is atomic, unlike the file-based and database
+# caches' read-modify-write.
+
+RATE_LIMITS = {
+    'blog:add_comment': {'user': '10/m', 'ip': '30/m'},
+    'blog:create_post': {'user': '5/m', 'ip': '20/m'},
+    'blog:edit_post': {'user': '20/m', 'ip': '60/m'},
+    'registration': {'ip': '10/h'},
+}
+RATE_LIMIT_CACHE = 'default'
+RATE_LIMIT_IP_META = 'REMOTE_ADDR'
+WRITE_CONCURRENCY_LIMIT = 16
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+# The first hasher of the profile hashes new passwords; the others only
+# verify existing hashes, which are upgraded on the next successful login.
+# Compare profiles on the target hardware with
+# `python manage.py benchmark_hashers`.
+
+PASSWORD_HASHER_FALLBACKS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'blogicum.hashers.ScryptPasswordHasher',
+    'blogicum.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASHER_PROFILES = {
+    'default': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'blogicum.hashers.ScryptPasswordHasher',
+    'argon2': 'blogicum.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = 'default'
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for hasher in PASSWORD_HASHER_FALLBACKS
+    if hasher != PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -136,3 +280,81 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
+DEFAULT_FILE_STORAGE = 'monitoring.storage.InstrumentedFileSystemStorage'
+
+# Static sitemaps written by `manage.py generate_sitemaps`; in production the
+# front proxy serves SITEMAP_ROOT at SITEMAP_URL. Post changes only mark
+# their shard dirty, rebuild those with `generate_sitemaps --dirty` from cron.
+
+SITE_URL = 'http://127.0.0.1:8000'
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_SHARD_SIZE = 50000
+
+# Anonymous HTML written by `manage.py prerender_pages` (about, rules, error
+# pages and published posts) for the front proxy to serve to requests
+# without a session cookie. Post and comment changes mark pages dirty for
+# `prerender_pages --dirty`.
+
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+
+# Request-scoped SQL profiling, see monitoring.middleware.
+# Aggregated counters per URL name are served at /internal/sql/ (staff only).
+
+SQL_PROFILING = {
+    'ENABLED': False,
+    'MAX_QUERIES': 30,
+    'MAX_DB_TIME': 0.2,
+    'SLOW_QUERY_TIME': 0.05,
+    'TOP_QUERIES': 5,
+}
+
+# Feed, category and post pages cached once for all users; the header, owner
+# controls and comment form are rendered into them per request. Changes bump
+# the generation in PAGE_CACHE_GENERATION_FILE, which all workers read.
+
+PAGE_CACHE = {
+    'ENABLED': False,
+    'TIMEOUT': 300,
+}
+PAGE_CACHE_GENERATION_FILE = BASE_DIR / 'page_cache' / 'generation'
+
+# Server-Timing response headers (total, middleware, view, db, render).
+# With ENABLED off, staff (or anyone under DEBUG) can still request them by
+# sending the REQUEST_HEADER.
+
+SERVER_TIMING = {
+    'ENABLED': False,
+    'REQUEST_HEADER': 'X-Server-Timing',
+}
+
+# Prometheus metrics are served at /internal/metrics/ to staff and to
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>"; without a token
+# only staff can read them. With several worker processes set
+# METRICS_MULTIPROC_DIR to a directory shared by the pool and cleaned on
+# deploy.
+
+METRICS_ENABLED = True
+METRICS_TOKEN = None
+METRICS_MULTIPROC_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'monitoring': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
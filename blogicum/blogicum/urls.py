@@ -15,6 +15,7 @@ urlpatterns = [
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('admin/', admin.site.urls),
+    path('internal/', include('monitoring.urls', namespace='monitoring')),
     path('auth/', include('django.contrib.auth.urls')),
     path('accounts/login/', views.LoginView.as_view(), name='login'),
     path('403csrf/', permission_denied, {'exception': 'PermissionDenied'},
@@ -0,0 +1,42 @@
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    def __init__(self, location, params):
+        self.alias = params.get('ALIAS') or location or 'default'
+        super().__init__(location, params)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        metrics.inc(
+            'blog_cache_requests_total',
+            cache=self.alias,
+            result='miss' if value is _missing else 'hit',
+        )
+        return default if value is _missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        metrics.inc(
+            'blog_cache_requests_total', len(found),
+            cache=self.alias, result='hit',
+        )
+        metrics.inc(
+            'blog_cache_requests_total', len(keys) - len(found),
+            cache=self.alias, result='miss',
+        )
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
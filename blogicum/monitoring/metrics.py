@@ -0,0 +1,202 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'blog_http_requests_total': (
+        COUNTER, 'HTTP responses by route, method and status code.'
+    ),
+    'blog_http_request_duration_seconds': (
+        HISTOGRAM, 'Time spent handling a request, including middleware.'
+    ),
+    'blog_template_render_seconds': (
+        HISTOGRAM, 'Time spent rendering a top-level template.'
+    ),
+    'blog_db_queries_total': (
+        COUNTER, 'Database queries executed while handling requests.'
+    ),
+    'blog_db_query_duration_seconds_total': (
+        COUNTER, 'Database time spent while handling requests.'
+    ),
+    'blog_cache_requests_total': (
+        COUNTER, 'Cache lookups by cache alias and result (hit or miss).'
+    ),
+    'blog_image_processing_seconds': (
+        HISTOGRAM, 'Time spent validating and storing uploaded images.'
+    ),
+}
+
+
+def _labels_key(labels):
+    return json.dumps(sorted(labels.items()), ensure_ascii=False)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = {
+                    'buckets': [0] * (len(DEFAULT_BUCKETS) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            state['buckets'][bisect_left(DEFAULT_BUCKETS, value)] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps({
+                'counters': self.counters,
+                'histograms': self.histograms,
+            }))
+
+
+registry = Registry()
+_last_flush = 0.0
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def get_multiprocess_dir():
+    directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+    return Path(directory) if directory else None
+
+
+def flush(force=False):
+    # Each worker owns one file named after its pid; the endpoint sums
+    # them, so counters of every process in the pool are exported.
+    global _last_flush
+    directory = get_multiprocess_dir()
+    now = time.monotonic()
+    interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+    if directory is None or (not force and now - _last_flush < interval):
+        return
+    _last_flush = now
+    directory.mkdir(parents=True, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w', encoding='utf-8') as file:
+        json.dump(registry.snapshot(), file)
+    os.replace(temp_path, directory / f'metrics_{os.getpid()}.json')
+
+
+atexit.register(flush, force=True)
+
+
+def merge(target, snapshot):
+    for name, series in snapshot['counters'].items():
+        merged = target['counters'].setdefault(name, {})
+        for key, value in series.items():
+            merged[key] = merged.get(key, 0) + value
+    for name, series in snapshot['histograms'].items():
+        merged = target['histograms'].setdefault(name, {})
+        for key, state in series.items():
+            if key not in merged:
+                merged[key] = state
+                continue
+            merged[key] = {
+                'buckets': [
+                    a + b for a, b in zip(merged[key]['buckets'],
+                                          state['buckets'])
+                ],
+                'sum': merged[key]['sum'] + state['sum'],
+                'count': merged[key]['count'] + state['count'],
+            }
+    return target
+
+
+def collect():
+    directory = get_multiprocess_dir()
+    if directory is None:
+        return registry.snapshot()
+    flush(force=True)
+    result = {'counters': {}, 'histograms': {}}
+    for path in sorted(directory.glob('metrics_*.json')):
+        try:
+            with open(path, encoding='utf-8') as file:
+                merge(result, json.load(file))
+        except (OSError, ValueError):
+            continue
+    return result
+
+
+def _format_labels(key, **extra):
+    pairs = json.loads(key) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+                '\n', r'\n'
+            ),
+        )
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render(snapshot):
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == COUNTER:
+            for key, value in snapshot['counters'].get(name, {}).items():
+                lines.append(f'{name}{_format_labels(key)} {value}')
+            continue
+        for key, state in snapshot['histograms'].get(name, {}).items():
+            cumulative = 0
+            bounds = [str(bound) for bound in DEFAULT_BUCKETS] + ['+Inf']
+            for bound, count in zip(bounds, state['buckets']):
+                cumulative += count
+                labels = _format_labels(key, le=bound)
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(key)} {state["sum"]}')
+            lines.append(
+                f'{name}_count{_format_labels(key)} {state["count"]}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .queries import collect_queries
+from .timing import RequestTimings, current_timings, measure
+
+logger = logging.getLogger('monitoring.sql')
+
+SERVER_TIMING_DEFAULTS = {
+    'ENABLED': False,
+    'REQUEST_HEADER': 'X-Server-Timing',
+}
+SQL_PROFILING_DEFAULTS = {
+    'ENABLED': False,
+    'MAX_QUERIES': 30,
+    'MAX_DB_TIME': 0.2,
+    'SLOW_QUERY_TIME': 0.05,
+    'TOP_QUERIES': 5,
+}
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {
+    'requests': 0,
+    'queries': 0,
+    'db_time': 0.0,
+    'duplicates': 0,
+    'flagged': 0,
+    'max_queries': 0,
+})
+
+
+def get_sql_profiling_options():
+    return {**SQL_PROFILING_DEFAULTS, **getattr(settings, 'SQL_PROFILING', {})}
+
+
+def get_server_timing_options():
+    return {**SERVER_TIMING_DEFAULTS, **getattr(settings, 'SERVER_TIMING', {})}
+
+
+def get_sql_stats():
+    with _stats_lock:
+        return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def get_route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match._func_path
+
+
+class SqlProfilingMiddleware:
+    def __init__(self, get_response):
+        self.options = get_sql_profiling_options()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_queries(capture_origin=True) as log:
+            response = self.get_response(request)
+        self.record(request, response, log)
+        return response
+
+    def record(self, request, response, log):
+        route = get_route_name(request)
+        db_time = log.total_time
+        duplicates = log.duplicates()
+        flagged = (
+            log.count > self.options['MAX_QUERIES']
+            or db_time > self.options['MAX_DB_TIME']
+            or any(
+                query['time'] > self.options['SLOW_QUERY_TIME']
+                for query in log.queries
+            )
+        )
+        with _stats_lock:
+            counters = _stats[route]
+            counters['requests'] += 1
+            counters['queries'] += log.count
+            counters['db_time'] += db_time
+            counters['duplicates'] += sum(
+                item['count'] - 1 for item in duplicates
+            )
+            counters['flagged'] += flagged
+            counters['max_queries'] = max(counters['max_queries'], log.count)
+        if not flagged:
+            return
+        record = {
+            'route': route,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': log.count,
+            'db_time': round(db_time, 6),
+            'duplicates': duplicates,
+            'slowest': [
+                {**query, 'time': round(query['time'], 6)}
+                for query in log.slowest(self.options['TOP_QUERIES'])
+            ],
+        }
+        logger.warning(
+            json.dumps(record, ensure_ascii=False),
+            extra={'sql_profile': record},
+        )
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_queries() as log:
+            response = self.get_response(request)
+        route = get_route_name(request)
+        metrics.observe(
+            'blog_http_request_duration_seconds',
+            time.perf_counter() - start,
+            route=route,
+        )
+        metrics.inc(
+            'blog_http_requests_total',
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        metrics.inc('blog_db_queries_total', log.count, route=route)
+        metrics.inc(
+            'blog_db_query_duration_seconds_total', log.total_time,
+            route=route,
+        )
+        metrics.flush()
+        return response
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.options = get_server_timing_options()
+        header = self.options['REQUEST_HEADER']
+        self.request_header = header and 'HTTP_' + header.upper().replace(
+            '-', '_'
+        )
+        if not (self.options['ENABLED'] or self.request_header):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with timings.measure('total'), collect_queries() as log:
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        if self.is_requested(request):
+            response['Server-Timing'] = self.format(timings, log)
+        return response
+
+    def is_requested(self, request):
+        if self.options['ENABLED']:
+            return True
+        if not request.META.get(self.request_header):
+            return False
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or (user is not None and user.is_staff)
+
+    def format(self, timings, log):
+        durations = timings.durations
+        total = durations.get('total', 0.0)
+        view = durations.get('view', 0.0)
+        metrics = (
+            ('total', total, 'Total'),
+            ('middleware', max(total - view, 0.0), 'Middleware'),
+            ('view', view, 'View incl. DB and render'),
+            ('db', log.total_time, f'Database ({log.count} queries)'),
+            ('render', durations.get('render', 0.0), 'Template render'),
+        )
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.1f};desc="{description}"'
+            for name, seconds, description in metrics
+        )
+
+
+class ViewTimingMiddleware:
+    # Must be the last middleware: everything it wraps is URL resolution,
+    # the view itself and the templates it renders.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure('view'):
+            return self.get_response(request)
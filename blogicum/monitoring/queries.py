@@ -0,0 +1,101 @@
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+PROJECT_DIR = str(settings.BASE_DIR)
+MONITORING_DIR = str(Path(__file__).resolve().parent)
+
+current_log = ContextVar('current_query_log', default=None)
+
+
+def find_origin():
+    code_origin = template_origin = None
+    frame = sys._getframe(2)
+    while frame is not None and not (code_origin and template_origin):
+        code = frame.f_code
+        if template_origin is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template_origin = f'{origin.template_name}:{token.lineno}'
+        filename = code.co_filename
+        if (
+            code_origin is None
+            and filename.startswith(PROJECT_DIR)
+            and not filename.startswith(MONITORING_DIR)
+            and 'site-packages' not in filename
+        ):
+            path = Path(filename).relative_to(PROJECT_DIR)
+            code_origin = f'{path}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return code_origin, template_origin
+
+
+class QueryLog:
+    def __init__(self, capture_origin=False):
+        self.capture_origin = capture_origin
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        origin = find_origin() if self.capture_origin else (None, None)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params),
+                'time': time.perf_counter() - start,
+                'code': origin[0],
+                'template': origin[1],
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['time'] for query in self.queries)
+
+    def duplicates(self):
+        counts = Counter(
+            (query['sql'], query['params']) for query in self.queries
+        )
+        return [
+            {'sql': sql, 'count': count}
+            for (sql, _), count in counts.most_common()
+            if count > 1
+        ]
+
+    def slowest(self, limit):
+        return sorted(
+            self.queries, key=lambda query: query['time'], reverse=True
+        )[:limit]
+
+
+@contextmanager
+def collect_queries(capture_origin=False):
+    # Nested calls share the outermost log, so several middlewares can
+    # read the same numbers without wrapping the cursors twice.
+    log = current_log.get()
+    if log is not None:
+        log.capture_origin = log.capture_origin or capture_origin
+        yield log
+        return
+    log = QueryLog(capture_origin)
+    token = current_log.set(log)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            yield log
+    finally:
+        current_log.reset(token)
@@ -0,0 +1,9 @@
+from django.core.files.storage import FileSystemStorage
+
+from . import metrics
+
+
+class InstrumentedFileSystemStorage(FileSystemStorage):
+    def _save(self, name, content):
+        with metrics.timer('blog_image_processing_seconds', operation='save'):
+            return super()._save(name, content)
@@ -0,0 +1,36 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from . import metrics
+from .timing import measure
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            with measure('render'):
+                return super().render(context, request)
+        finally:
+            metrics.observe(
+                'blog_template_render_seconds',
+                time.perf_counter() - start,
+                template=self.origin.template_name or '<string>',
+            )
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.durations = {}
+        self.active = set()
+
+    @contextmanager
+    def measure(self, phase):
+        # Nested measurements of the same phase (an included template
+        # rendered through the backend) are counted once.
+        if phase in self.active:
+            yield
+            return
+        self.active.add(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active.discard(phase)
+            self.add(phase, time.perf_counter() - start)
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def measure(phase):
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.measure(phase):
+        yield
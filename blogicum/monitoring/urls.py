@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('sql/', views.sql_stats, name='sql_stats'),
+    path('metrics/', views.prometheus_metrics, name='metrics'),
+]
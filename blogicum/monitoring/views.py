@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
+from .middleware import get_sql_stats
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@staff_member_required
+def sql_stats(request):
+    return JsonResponse(get_sql_stats(), json_dumps_params={'indent': 2})
+
+
+def has_metrics_token(request):
+    # REMOTE_ADDR is the proxy's address behind one, so the scraper
+    # authenticates with a bearer token instead.
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    return bool(token) and constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    )
+
+
+def prometheus_metrics(request):
+    if not request.user.is_staff and not has_metrics_token(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -0,0 +1,34 @@
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('select[data-autocomplete-url]').forEach((select) => {
+    const search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control mb-2';
+    search.placeholder = 'Начните вводить название места';
+    select.before(search);
+
+    let timer = null;
+    search.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(async () => {
+        const url = new URL(select.dataset.autocompleteUrl, window.location.origin);
+        url.searchParams.set('q', search.value.trim());
+        const response = await fetch(url, {credentials: 'same-origin'});
+        if (!response.ok) {
+          return;
+        }
+        const {results} = await response.json();
+        const selected = select.value;
+        [...select.options].forEach((option) => {
+          if (option.value && option.value !== selected) {
+            option.remove();
+          }
+        });
+        results.forEach(({id, name}) => {
+          if (String(id) !== selected) {
+            select.add(new Option(name, id));
+          }
+        });
+      }, 250);
+    });
+  });
+});
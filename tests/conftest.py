@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,34 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from blog import view_counts
+
+    for cache in caches.all():
+        cache.clear()
+    view_counts._pending.clear()
+    yield
+    # Views left in the buffer would be flushed at exit, without a database.
+    view_counts._pending.clear()
+
+
+@pytest.fixture(autouse=True)
+def shared_files(settings, tmp_path):
+    # Feeds are rendered for SITE_URL whenever a post is saved.
+    settings.SITE_URL = 'http://testserver'
+    settings.FEED_ROOT = tmp_path / 'feeds'
+    settings.PAGE_CACHE_GENERATION_FILE = tmp_path / 'page_cache'
+
+
+@pytest.fixture
+def shared_caches(settings):
+    # In tests the local cache is shared by the whole "pool" of workers.
+    settings.USER_CACHE = 'default'
+    settings.SESSION_CACHE_ALIAS = 'default'
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,50 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+ROWS = 60
+
+
+def changelist_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url).status_code == 200
+    return [query['sql'] for query in queries]
+
+
+@pytest.mark.parametrize('model', ['post', 'comment'])
+def test_changelist_queries_do_not_grow_with_rows(
+        mixer, admin_client, model
+):
+    url = f'/admin/blog/{model}/'
+    mixer.cycle(5).blend('blog.Comment')
+    changelist_queries(admin_client, url)
+    small = changelist_queries(admin_client, url)
+
+    mixer.cycle(ROWS).blend('blog.Comment')
+    large = changelist_queries(admin_client, url)
+    assert len(large) == len(small)
+    assert not any('COUNT(' in sql for sql in large)
+
+
+def test_post_form_uses_lookup_widgets(admin_client, mixer):
+    mixer.cycle(ROWS).blend('blog.Location')
+    content = admin_client.get('/admin/blog/post/add/').content.decode()
+    assert 'vForeignKeyRawIdAdminField' in content
+    assert 'admin-autocomplete' in content
+    assert content.count('<option') < ROWS
+
+
+def test_admin_deletes_authors_with_posts(
+        admin_client, mixer, user, published_category
+):
+    post = mixer.blend('blog.Post', author=user, category=published_category)
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    response = admin_client.post('/admin/auth/user/', {
+        'action': 'delete_selected',
+        '_selected_action': [user.pk],
+        'post': 'yes',
+    })
+    assert response.status_code == 302
+    assert not type(user).objects.filter(pk=user.pk).exists()
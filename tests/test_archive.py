@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import ArchiveMonth, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def at(year, month, day=10):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+def test_archive_is_served_from_month_buckets(
+        mixer, user, client, published_category, another_category
+):
+    march = mixer.cycle(12).blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=at(2023, 3),
+    )
+    april = mixer.blend(
+        'blog.Post', author=user, category=another_category,
+        pub_date=at(2023, 4),
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=at(2022, 12), is_published=False,
+    )
+    old = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=at(2021, 1),
+    )
+
+    response = client.get('/archive/')
+    assert response.context['years'] == [(2023, 13), (2021, 1)]
+
+    client.get('/archive/2023/3/')
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/archive/2023/3/', {'page': 2})
+    # Only the page of posts itself is grouped (for its comment counts).
+    assert all(
+        'LIMIT' in query['sql'] for query in context.captured_queries
+        if 'GROUP BY' in query['sql'] and 'FROM "blog_post"' in query['sql']
+    )
+    page_obj = response.context['page_obj']
+    assert page_obj.paginator.count == 12
+    assert len(page_obj) == 2
+    assert {post.id for post in page_obj} <= {post.id for post in march}
+    assert [month.month for month, _ in response.context['months']] == [4, 3]
+
+    response = client.get(
+        f'/category/{another_category.slug}/archive/2023/'
+    )
+    assert [post.id for post in response.context['page_obj']] == [april.id]
+    assert client.get('/archive/2023/13/').status_code == 404
+    assert client.get('/archive/2023/0/').status_code == 404
+
+    old.pub_date = at(2023, 4)
+    old.save()
+    Post.objects.filter(pk=april.pk).delete()
+    assert client.get('/archive/').context['years'] == [(2023, 13)]
+
+    call_command(
+        'moderate', 'posts', 'unpublish',
+        '--category', published_category.slug, '--since', '2023-04-01',
+    )
+    assert not ArchiveMonth.objects.filter(month__month=4, posts_count__gt=0)
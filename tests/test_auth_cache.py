@@ -0,0 +1,42 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('shared_caches'),
+]
+
+
+def _tables_queried(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return ' '.join(query['sql'] for query in context.captured_queries)
+
+
+def test_user_and_session_are_served_from_cache(user_client):
+    _tables_queried(user_client, '/pages/about/')
+    sql = _tables_queried(user_client, '/pages/about/')
+    assert '"auth_user"' not in sql
+    assert '"django_session"' not in sql
+
+
+def test_cached_user_is_refreshed_after_profile_edit(user, user_client):
+    _tables_queried(user_client, '/pages/about/')
+    user.username = 'renamed_user'
+    user.save()
+    content = user_client.get('/pages/about/').content.decode('utf-8')
+    assert 'renamed_user' in content
+
+
+def test_users_are_not_cached_without_a_shared_cache(
+        settings, user, user_client
+):
+    settings.USER_CACHE = None
+    _tables_queried(user_client, '/pages/about/')
+    # Another worker deactivating the user leaves no local copy behind.
+    type(user).objects.filter(pk=user.pk).update(is_active=False)
+    sql = _tables_queried(user_client, '/pages/about/')
+    assert '"auth_user"' in sql
+    assert not user_client.get('/pages/about/').wsgi_request.user.is_active
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.deletion import delete_user
+from blog.models import AuthorStats, Comment
+from blog.moderation import delete_comments
+from blog.stats import recount_author_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stats(user):
+    return AuthorStats.objects.get(author=user)
+
+
+def test_author_stats_follow_post_and_comment_writes(
+        mixer, user, another_user, published_category
+):
+    now = timezone.now()
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=now - timedelta(days=2),
+    )
+    draft = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False, pub_date=now,
+    )
+    comment = mixer.blend('blog.Comment', post=post, author=another_user)
+    stats = _stats(user)
+    assert (stats.posts_count, stats.published_count) == (2, 1)
+    assert stats.comments_received == 1
+    assert stats.last_post_date == post.pub_date
+
+    draft.is_published = True
+    draft.save()
+    assert _stats(user).last_post_date == draft.pub_date
+
+    delete_comments(Comment.objects.filter(pk=comment.pk))
+    draft.delete()
+    stats = _stats(user)
+    assert (stats.posts_count, stats.published_count) == (1, 1)
+    assert stats.comments_received == 0
+    assert stats.last_post_date == post.pub_date
+
+    expected = AuthorStats.objects.values().get(author=user)
+    AuthorStats.objects.all().delete()
+    recount_author_stats([user.pk])
+    assert AuthorStats.objects.values().get(author=user) == expected
+
+
+def test_profile_paginator_uses_stored_count(
+        user_client, user, many_posts_with_published_locations
+):
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(f'/profile/{user.username}/')
+    assert response.context['page_obj'].paginator.count == len(
+        many_posts_with_published_locations
+    )
+    assert not any(
+        'COUNT(*)' in query['sql'] for query in context.captured_queries
+    )
+
+
+def test_deleting_an_author_keeps_counters_consistent(
+        mixer, user, another_user, published_category
+):
+    for author in (user, another_user):
+        posts = mixer.cycle(2).blend(
+            'blog.Post', author=author, category=published_category,
+            pub_date=timezone.now() - timedelta(days=1),
+        )
+        mixer.cycle(2).blend('blog.Comment', post=posts[0], author=user)
+    published_category.refresh_from_db()
+    assert published_category.posts_count == 4
+
+    # The cascade from the user row runs the per-post signals.
+    user.delete()
+    assert not AuthorStats.objects.filter(author_id=user.pk).exists()
+    assert _stats(another_user).comments_received == 0
+    published_category.refresh_from_db()
+    assert published_category.posts_count == 2
+
+    third = mixer.blend('auth.User')
+    post = mixer.blend(
+        'blog.Post', author=third, category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.cycle(3).blend('blog.Comment', post=post, author=another_user)
+    delete_user(another_user)
+    assert not type(user).objects.filter(pk=another_user.pk).exists()
+    assert _stats(third).comments_received == 0
+    published_category.refresh_from_db()
+    assert published_category.posts_count == 1
+
+
+def test_visitors_do_not_see_scheduled_posts_in_stats(
+        mixer, user, user_client, another_user_client, published_category
+):
+    now = timezone.now()
+    for pub_date in (now - timedelta(days=1), now + timedelta(days=300)):
+        mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=True, pub_date=pub_date,
+        )
+    url = f'/profile/{user.username}/'
+    content = another_user_client.get(url).content.decode('utf-8')
+    assert 'Публикаций: 1<' in content
+    assert 'Последняя публикация' not in content
+    content = user_client.get(url).content.decode('utf-8')
+    assert 'Публикаций: 2<' in content
+    assert 'Последняя публикация' in content
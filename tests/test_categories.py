@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Category
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_category_posts_count_is_maintained(
+        mixer, user, published_category, another_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False,
+    )
+
+    def counts():
+        return dict(Category.objects.values_list('pk', 'posts_count'))
+
+    assert counts()[published_category.pk] == 1
+
+    post.category = another_category
+    post.save()
+    assert counts()[published_category.pk] == 0
+    assert counts()[another_category.pk] == 1
+
+    post.delete()
+    assert counts()[another_category.pk] == 0
+
+
+def test_category_list_and_cached_lookup(
+        client, published_category, post_with_published_location
+):
+    response = client.get('/category/')
+    assert response.status_code == 200
+    assert published_category.title in response.content.decode('utf-8')
+
+    published_category.is_published = False
+    published_category.save()
+    assert client.get(
+        f'/category/{published_category.slug}/'
+    ).status_code == 404
+
+
+def test_category_list_leaves_out_scheduled_posts(
+        client, mixer, user, published_category, another_category
+):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.cycle(2).blend(
+        'blog.Post', author=user, category=another_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    another_category.refresh_from_db()
+    assert another_category.posts_count == 2
+
+    categories = client.get('/category/').context['categories']
+    assert [
+        (category.pk, category.posts_count) for category in categories
+    ] == [(published_category.pk, 1), (another_category.pk, 0)]
@@ -0,0 +1,113 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from blog import deletion, moderation
+from blog.models import Comment, DeletionJob, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_user_deletion_hides_then_resumes_in_batches(
+        mixer, user, another_user, published_category
+):
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category
+    )
+    mixer.cycle(3).blend('blog.Comment', post=posts[0], author=another_user)
+    mixer.cycle(2).blend('blog.Comment', post=posts[1], author=user)
+
+    job = deletion.schedule_user_deletion(user)
+    user.refresh_from_db()
+    assert not user.is_active
+    assert not Post.objects.filter(author=user, is_published=True).exists()
+    assert not Comment.objects.filter(author=user, is_published=True)
+
+    assert not deletion.run_job(job, batch_size=2, max_batches=2)
+    assert job.finished_at is None
+    assert job.comments_deleted == 4
+
+    call_command('process_deletions', '--batch-size', '2')
+    job.refresh_from_db()
+    assert job.finished_at is not None
+    assert (job.comments_deleted, job.posts_deleted) == (5, 3)
+    assert not Post.objects.filter(pk__in=[post.pk for post in posts])
+    assert not type(user).objects.filter(pk=user.pk).exists()
+
+
+def test_post_with_many_comments_is_deleted_in_background(
+        settings, mixer, user_client, post_with_published_location
+):
+    settings.DELETION_BATCH_SIZE = 2
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post)
+
+    user_client.post(f'/posts/{post.id}/delete/')
+    post.refresh_from_db()
+    assert not post.is_published
+    assert post.pending_deletion
+    assert DeletionJob.objects.filter(
+        kind=DeletionJob.POST, object_id=post.id, finished_at=None
+    ).exists()
+    # The author can neither see nor re-publish it until the job runs.
+    url = f'/posts/{post.id}/edit/'
+    assert user_client.get(url).status_code == 404
+    assert user_client.post(url, {
+        'title': post.title,
+        'text': post.text,
+        'pub_date': post.pub_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'category': post.category_id,
+        'is_published': 'on',
+    }).status_code == 404
+    assert user_client.get(f'/posts/{post.id}/').status_code == 404
+    post.refresh_from_db()
+    assert not post.is_published
+
+    call_command('process_deletions')
+    assert not Post.objects.filter(pk=post.id).exists()
+
+
+def test_post_delete_queries_do_not_grow_with_comments(
+        mixer, user, another_user, published_category
+):
+    queries = []
+    for comments in (1, 50):
+        post = mixer.blend(
+            'blog.Post', author=user, category=published_category
+        )
+        mixer.cycle(comments).blend(
+            'blog.Comment', post=post, author=another_user
+        )
+        with CaptureQueriesContext(connection) as context:
+            post.delete()
+        queries.append(len(context.captured_queries))
+    assert queries[0] == queries[1]
+    assert not Comment.objects.exists()
+    user.post_stats.refresh_from_db()
+    assert user.post_stats.comments_received == 0
+
+
+def test_post_images_are_deleted_after_the_commit(
+        settings, tmp_path, django_capture_on_commit_callbacks,
+        post_with_published_location
+):
+    settings.MEDIA_ROOT = tmp_path
+    image = tmp_path / 'post_images' / 'image.jpg'
+    image.parent.mkdir()
+    image.write_bytes(b'image')
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(image='post_images/image.jpg')
+
+    with pytest.raises(RuntimeError):
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                moderation.delete_posts(Post.objects.filter(pk=post.pk))
+                raise RuntimeError
+    assert image.exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            moderation.delete_posts(Post.objects.filter(pk=post.pk))
+            assert image.exists()
+    assert not image.exists()
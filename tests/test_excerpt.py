@@ -0,0 +1,47 @@
+import pytest
+from django.db import connection
+from django.template.defaultfilters import truncatewords
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import EXCERPT_WORDS, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('text', [
+    'Short text',
+    ' '.join(f'word{number}' for number in range(30)),
+    'Lines\nof text\n\nwith   gaps and <b>markup</b> ' * 3,
+])
+def test_excerpt_matches_truncatewords(mixer, text):
+    post = mixer.blend('blog.Post', text=text)
+    assert post.excerpt == truncatewords(text, EXCERPT_WORDS)
+    assert Post.objects.get(pk=post.pk).excerpt == post.excerpt
+
+
+def test_excerpt_follows_saved_text(mixer):
+    post = mixer.blend('blog.Post', text='Old text')
+    post.text = 'New text'
+    post.save()
+    assert Post.objects.get(pk=post.pk).excerpt == 'New text'
+
+    post.text = 'Newer text'
+    post.save(update_fields=['text'])
+    assert Post.objects.get(pk=post.pk).excerpt == 'Newer text'
+
+
+def test_deferred_text_leaves_excerpt_alone(mixer):
+    post = mixer.blend('blog.Post', text='Stored text')
+    Post.objects.filter(pk=post.pk).update(excerpt='Kept excerpt')
+    post = Post.objects.defer('text').get(pk=post.pk)
+    post.title = 'Edited'
+    with CaptureQueriesContext(connection) as queries:
+        post.save()
+    updates = [
+        query['sql'] for query in queries
+        if query['sql'].startswith('UPDATE "blog_post"')
+    ]
+    assert len(updates) == 1
+    assert '"text"' not in updates[0]
+    post = Post.objects.get(pk=post.pk)
+    assert (post.title, post.excerpt) == ('Edited', 'Kept excerpt')
@@ -0,0 +1,85 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_lists_visible_posts_and_supports_conditional_get(
+        client, post_with_published_location,
+        unpublished_posts_with_published_locations
+):
+    response = client.get('/feeds/rss/')
+    assert response.status_code == 200
+    content = response.content.decode('utf-8')
+    assert post_with_published_location.title in content
+    for post in unpublished_posts_with_published_locations:
+        assert post.title not in content
+
+    not_modified = client.get(
+        '/feeds/rss/', HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert not_modified.status_code == 304
+
+    post_with_published_location.title = 'Changed feed title'
+    post_with_published_location.save()
+    changed = client.get('/feeds/rss/', HTTP_IF_NONE_MATCH=response['ETag'])
+    assert changed.status_code == 200
+    assert 'Changed feed title' in changed.content.decode('utf-8')
+
+
+def test_category_and_author_feeds(
+        client, user, published_category, post_with_published_location
+):
+    for url in (
+        f'/feeds/category/{published_category.slug}/atom/',
+        f'/feeds/author/{user.username}/atom/',
+    ):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/atom+xml')
+        assert post_with_published_location.title in (
+            response.content.decode('utf-8')
+        )
+    assert client.get('/feeds/json/').status_code == 404
+
+
+def test_feeds_are_rendered_on_write_into_shared_files(
+        settings, client, django_capture_on_commit_callbacks, mixer, user,
+        published_category, post_with_published_location
+):
+    post = post_with_published_location
+    response = client.get('/feeds/rss/')
+    assert response['Last-Modified'] == http_date(post.pub_date.timestamp())
+    assert client.get(
+        '/feeds/rss/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    ).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.is_published = False
+        post.save()
+    # Every worker reads the files, which were rendered by the write.
+    stored = ' '.join(
+        json.loads(path.read_text())['content']
+        for path in settings.FEED_ROOT.glob('*.json')
+    )
+    assert len(list(settings.FEED_ROOT.glob('*.json'))) == 6
+    assert post.title not in stored
+    assert post.title not in client.get('/feeds/rss/').content.decode()
+
+    scheduled = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+    client.get('/feeds/atom/')
+    [path] = [
+        path for path in settings.FEED_ROOT.glob('*.json')
+        if 'atom' in json.loads(path.read_text())['content_type']
+    ]
+    # The stored feed expires when the scheduled post is due.
+    assert json.loads(path.read_text())['expires'] == pytest.approx(
+        scheduled.pub_date.timestamp(), abs=5
+    )
@@ -0,0 +1,29 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from blogicum.hashers import ScryptPasswordHasher
+
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+SCRYPT = 'blogicum.hashers.ScryptPasswordHasher'
+
+
+def test_scrypt_hasher_roundtrip():
+    hasher = ScryptPasswordHasher()
+    encoded = hasher.encode('secret-password', hasher.salt())
+    assert encoded.startswith('scrypt$')
+    assert hasher.verify('secret-password', encoded)
+    assert not hasher.verify('wrong-password', encoded)
+    assert not hasher.must_update(encoded)
+
+
+@pytest.mark.django_db
+def test_password_is_rehashed_with_profile_hasher_on_login(client):
+    User = get_user_model()
+    with override_settings(PASSWORD_HASHERS=[PBKDF2, SCRYPT]):
+        User.objects.create_user('hasher_user', password='Qwerty-12345')
+    with override_settings(PASSWORD_HASHERS=[SCRYPT, PBKDF2]):
+        assert client.login(username='hasher_user', password='Qwerty-12345')
+    assert User.objects.get(
+        username='hasher_user'
+    ).password.startswith('scrypt$')
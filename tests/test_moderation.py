@@ -0,0 +1,61 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import AuthorStats, Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def spam(mixer, user, published_category):
+    posts = mixer.cycle(7).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, title='Buy casino chips',
+    )
+    mixer.cycle(7).blend('blog.Comment', post=(post for post in posts))
+    return posts
+
+
+def test_unpublish_and_delete_in_batches(
+        spam, user, published_category, post_with_published_location
+):
+    with CaptureQueriesContext(connection) as queries:
+        call_command(
+            'moderate', 'posts', 'unpublish', '--text', 'casino',
+            '--chunk-size', '3',
+        )
+    updates = [q for q in queries if q['sql'].startswith('UPDATE "blog_post"')]
+    assert len(updates) == 3
+    spam_ids = [post.pk for post in spam]
+    assert not Post.objects.filter(pk__in=spam_ids, is_published=True)
+    published_category.refresh_from_db()
+    assert published_category.posts_count == 1
+    stats = AuthorStats.objects.get(author=user)
+    assert stats.published_count == 1
+
+    call_command('moderate', 'posts', 'delete', '--author', user.username,
+                 '--text', 'casino')
+    assert Post.objects.filter(author=user).count() == 1
+    assert not Comment.objects.filter(post_id__in=spam_ids)
+    stats.refresh_from_db()
+    assert (stats.posts_count, stats.comments_received) == (1, 0)
+
+
+def test_admin_recategorize_action(client, django_user_model, spam, mixer):
+    admin = django_user_model.objects.create_superuser('admin', 'a@a.a', 'p')
+    client.force_login(admin)
+    target = mixer.blend('blog.Category', is_published=True)
+    client.post('/admin/blog/post/', {
+        'action': 'recategorize',
+        'category': target.pk,
+        '_selected_action': [post.pk for post in spam[:4]],
+    })
+    assert Post.objects.filter(category=target).count() == 4
+    assert Category.objects.get(pk=target.pk).posts_count == 4
+
+
+def test_moderate_requires_filters():
+    with pytest.raises(CommandError, match='--all'):
+        call_command('moderate', 'comments', 'unpublish')
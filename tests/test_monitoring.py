@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from django.test import Client, override_settings
+
+from monitoring.middleware import get_sql_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_sql_profiling_logs_flagged_requests(
+        caplog, post_with_published_location
+):
+    profiling = {'ENABLED': True, 'MAX_QUERIES': 0}
+    with override_settings(SQL_PROFILING=profiling):
+        with caplog.at_level('WARNING', logger='monitoring.sql'):
+            response = Client().get(
+                f'/posts/{post_with_published_location.id}/'
+            )
+    assert response.status_code == 200
+    records = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'monitoring.sql'
+    ]
+    assert records and records[0]['route'] == 'blog:post_detail'
+    assert records[0]['queries'] > 0
+    assert any(
+        query['code'] and query['code'].startswith('blog/views.py')
+        for query in records[0]['slowest']
+    )
+    assert get_sql_stats()['blog:post_detail']['requests'] >= 1
+
+
+def test_metrics_endpoint_exports_prometheus_text(
+        client, settings, post_with_published_location
+):
+    client.get(f'/posts/{post_with_published_location.id}/')
+    assert client.get('/internal/metrics/').status_code == 403
+    settings.METRICS_TOKEN = 'scraper-token'
+    assert client.get(
+        '/internal/metrics/', HTTP_AUTHORIZATION='Bearer wrong'
+    ).status_code == 403
+    response = client.get(
+        '/internal/metrics/', HTTP_AUTHORIZATION='Bearer scraper-token'
+    )
+    assert response.status_code == 200
+    content = response.content.decode('utf-8')
+    assert '# TYPE blog_http_requests_total counter' in content
+    assert (
+        'blog_http_request_duration_seconds_bucket'
+        '{route="blog:post_detail",le="+Inf"}'
+    ) in content
+    assert 'blog_template_render_seconds_count{template="blog/detail.html"}'\
+        in content
+    assert 'blog_db_queries_total{route="blog:post_detail"}' in content
+
+
+def test_metrics_are_aggregated_across_processes(tmp_path):
+    from monitoring import metrics
+
+    (tmp_path / 'metrics_1.json').write_text(json.dumps({
+        'counters': {'blog_db_queries_total': {'[["route", "x"]]': 2}},
+        'histograms': {},
+    }))
+    with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+        metrics.inc('blog_db_queries_total', 3, route='x')
+        snapshot = metrics.collect()
+    queries = snapshot['counters']['blog_db_queries_total']
+    assert queries['[["route", "x"]]'] >= 5
+
+
+def test_server_timing_header(client, post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    assert 'Server-Timing' not in client.get(url)
+
+    with override_settings(SERVER_TIMING={'ENABLED': True}):
+        response = Client().get(url)
+    phases = {
+        item.split(';')[0].strip()
+        for item in response['Server-Timing'].split(',')
+    }
+    assert phases == {'total', 'middleware', 'view', 'db', 'render'}
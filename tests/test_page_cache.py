@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.publishing import bump_generation
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_shared_page_body_gets_per_user_fragments(
+        settings, client, user_client, another_user_client,
+        comment_to_a_post
+):
+    settings.PAGE_CACHE = {'ENABLED': True, 'TIMEOUT': 60}
+    post = comment_to_a_post.post
+    url = f'/posts/{post.id}/'
+
+    anonymous = client.get(url).content.decode('utf-8')
+    assert 'Регистрация' in anonymous
+    assert '<!--personal' not in anonymous
+
+    with CaptureQueriesContext(connection) as cached:
+        author = user_client.get(url).content.decode('utf-8')
+    assert not any('blog_post' in query['sql'] for query in cached)
+    assert f'/posts/{post.id}/edit/' in author
+    assert 'csrfmiddlewaretoken' in author
+    assert 'Регистрация' not in author
+
+    other = another_user_client.get(url).content.decode('utf-8')
+    assert f'/posts/{post.id}/edit/' not in other
+    assert 'csrfmiddlewaretoken' in other
+
+    comment_to_a_post.text = 'Changed cached comment'
+    comment_to_a_post.save()
+    assert 'Changed cached comment' in client.get(url).content.decode()
+
+
+def test_cache_key_and_generation_are_shared(
+        settings, client, post_with_published_location
+):
+    settings.PAGE_CACHE = {'ENABLED': True, 'TIMEOUT': 60}
+    client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/?utm_source=x')
+        client.get('/?x=1')
+    assert not any('blog_post' in query['sql'] for query in queries)
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/?page=2')
+    assert any('blog_post' in query['sql'] for query in queries)
+
+    # Another worker unpublishing the post bumps the shared generation.
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        is_published=False
+    )
+    bump_generation(settings.PAGE_CACHE_GENERATION_FILE)
+    assert post_with_published_location.title not in (
+        client.get('/').content.decode('utf-8')
+    )
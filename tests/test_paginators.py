@@ -0,0 +1,54 @@
+import json
+from base64 import urlsafe_b64encode
+
+import pytest
+from django.core.cache import cache
+
+from blog.models import Post
+from blog.paginators import (
+    BlogPaginator,
+    EstimatedCountPaginator,
+    NoCountPaginator,
+)
+
+
+def test_page_window_is_elided():
+    page = BlogPaginator(list(range(1000)), 10).get_page(50)
+    window = list(page.page_window)
+    assert window == [1, '…', 48, 49, 50, 51, 52, '…', 100]
+
+
+def test_no_count_paginator_detects_next_page_with_lookahead():
+    paginator = NoCountPaginator(list(range(25)), 10)
+    assert paginator.get_page(2).has_next()
+    last = paginator.get_page(3)
+    assert not last.has_next() and len(last) == 5
+    assert list(last.page_window) == [1, 2, 3]
+    assert paginator.get_page(7).number == 1
+
+
+@pytest.mark.django_db
+def test_estimated_count_is_cached(
+        many_posts_with_published_locations, django_assert_num_queries
+):
+    posts = Post.objects.order_by('-pub_date')
+    paginator = EstimatedCountPaginator(posts, 10, 'test:count', 60)
+    assert paginator.count == len(many_posts_with_published_locations)
+    Post.objects.all().delete()
+    with django_assert_num_queries(1):
+        page = EstimatedCountPaginator(posts, 10, 'test:count', 60).get_page(1)
+        assert len(page) == 0 and not page.has_next()
+    cache.delete('test:count')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('values', [
+    ['x', 'y'], [None, None], [{'a': 1}, 2], [1.5], 'garbage',
+])
+@pytest.mark.parametrize('url', ['/popular/', '/timeline/'])
+def test_bad_cursor_shows_first_page(user_client, url, values):
+    cursor = urlsafe_b64encode(json.dumps(values).encode()).decode()
+    for bad in (cursor, '%%%', '[1]'):
+        response = user_client.get(url, {'cursor': bad})
+        assert response.status_code == 200
+        assert response.context['page_obj'].cursor is None
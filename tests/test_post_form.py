@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_form_offers_only_published_choices(
+        mixer, user_client, published_category, published_location
+):
+    hidden_category = mixer.blend('blog.Category', is_published=False)
+    mixer.cycle(5).blend('blog.Location', is_published=True)
+
+    user_client.get('/posts/create/')
+    with CaptureQueriesContext(connection) as queries:
+        content = user_client.get('/posts/create/').content.decode('utf-8')
+    assert not any('blog_category' in q['sql'] for q in queries)
+    assert not any('blog_location' in q['sql'] for q in queries)
+    assert published_category.title in content
+    assert hidden_category.title not in content
+    assert published_location.name not in content
+    assert 'data-autocomplete-url="/locations/autocomplete/"' in content
+
+
+def test_location_autocomplete(
+        mixer, client, user_client, published_location
+):
+    mixer.blend(
+        'blog.Location', is_published=False, name=published_location.name
+    )
+    assert client.get('/locations/autocomplete/?q=x').status_code == 302
+
+    term = published_location.name[:3]
+    results = user_client.get(
+        '/locations/autocomplete/', {'q': term}
+    ).json()['results']
+    assert [result['id'] for result in results] == [published_location.id]
+
+    published_location.name = term + ' renamed'
+    published_location.save()
+    results = user_client.get(
+        '/locations/autocomplete/', {'q': term}
+    ).json()['results']
+    assert results[0]['name'] == term + ' renamed'
+
+
+def test_editing_keeps_unpublished_category_and_location(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.category.is_published = False
+    post.category.save()
+    post.location.is_published = False
+    post.location.save()
+    url = f'/posts/{post.id}/edit/'
+
+    content = user_client.get(url).content.decode('utf-8')
+    assert f'<option value="{post.category_id}" selected>' in content
+    response = user_client.post(url, {
+        'title': 'Edited',
+        'text': post.text,
+        'pub_date': post.pub_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'category': post.category_id,
+        'location': post.location_id,
+    })
+    assert response.status_code == 302
+    post.refresh_from_db()
+    assert post.title == 'Edited'
+    assert post.location_id is not None
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_prerender_writes_anonymous_pages_and_updates_dirty_posts(
+        settings, tmp_path, comment_to_a_post,
+        unpublished_posts_with_published_locations
+):
+    settings.PRERENDER_ROOT = tmp_path
+    settings.SITE_URL = 'http://testserver'
+    call_command('prerender_pages')
+
+    assert (tmp_path / 'pages' / 'about' / 'index.html').exists()
+    assert (tmp_path / 'pages' / 'rules' / 'index.html').exists()
+    assert (tmp_path / '404.html').exists()
+    comment = comment_to_a_post
+    post_page = tmp_path / 'posts' / str(comment.post_id) / 'index.html'
+    content = post_page.read_text()
+    assert f'name="comment_{comment.id}"' in content
+    assert 'Регистрация' in content
+    for post in unpublished_posts_with_published_locations:
+        assert not (tmp_path / 'posts' / str(post.id)).exists()
+
+    comment.text = 'Changed prerendered comment'
+    comment.save()
+    call_command('prerender_pages', '--dirty')
+    assert 'Changed prerendered comment' in post_page.read_text()
+
+    post = comment.post
+    post.is_published = False
+    post.save()
+    call_command('prerender_pages', '--dirty')
+    assert not post_page.exists()
+
+
+def test_prerender_follows_categories_and_scheduled_posts(
+        settings, tmp_path, post_with_published_location
+):
+    settings.PRERENDER_ROOT = tmp_path
+    settings.SITE_URL = 'http://testserver'
+    post = post_with_published_location
+    post_page = tmp_path / 'posts' / str(post.id) / 'index.html'
+    call_command('prerender_pages')
+    assert 'Просмотры' not in post_page.read_text()
+
+    category = post.category
+    category.is_published = False
+    category.save()
+    assert (tmp_path / '.dirty').read_text() == f'{post.id}\n'
+    call_command('prerender_pages', '--dirty')
+    assert not post_page.exists()
+    category.is_published = True
+    category.save()
+    call_command('prerender_pages', '--dirty')
+    assert post_page.exists()
+
+    # A scheduled post is rendered once its pub_date passes.
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() + timedelta(days=1)
+    )
+    call_command('prerender_pages')
+    assert not post_page.exists()
+    Post.objects.filter(pk=post.pk).update(pub_date=timezone.now())
+    call_command('prerender_pages', '--dirty')
+    assert post_page.exists()
@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.usefixtures('shared_caches'),
+]
+
+# Warm request: the user and the session come from the cache, so a profile
+# page costs the profile owner, their stats row and one feed query (plus a
+# COUNT for visitors, who only see visible posts, and whether they follow
+# the author).
+OWNER_QUERIES = 3
+VISITOR_QUERIES = 5
+
+
+def _profile_queries(client, user):
+    url = f'/profile/{user.username}/'
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, len(context.captured_queries)
+
+
+def test_owner_sees_all_posts_in_constant_queries(
+        user_client, user, many_posts_with_published_locations,
+        unpublished_posts_with_published_locations, future_posts
+):
+    response, queries = _profile_queries(user_client, user)
+    assert queries == OWNER_QUERIES
+    page_obj = response.context['page_obj']
+    assert page_obj.paginator.count == (
+        len(many_posts_with_published_locations)
+        + len(unpublished_posts_with_published_locations)
+        + len(future_posts)
+    )
+
+
+def test_visitor_sees_visible_posts_in_constant_queries(
+        another_user_client, user, many_posts_with_published_locations,
+        unpublished_posts_with_published_locations, future_posts,
+        posts_with_unpublished_category
+):
+    response, queries = _profile_queries(another_user_client, user)
+    assert queries == VISITOR_QUERIES
+    page_obj = response.context['page_obj']
+    assert page_obj.paginator.count == len(
+        many_posts_with_published_locations
+    )
+    for post in page_obj:
+        assert post.is_published and post.category.is_published
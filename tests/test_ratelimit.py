@@ -0,0 +1,55 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import override_settings
+from django.urls import resolve
+
+from blog.middleware import RateLimitMiddleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comments_are_throttled_per_user(
+        user_client, post_with_published_location
+):
+    url = f'/posts/{post_with_published_location.id}/comment/'
+    limits = {'blog:add_comment': {'user': '2/m'}}
+    with override_settings(RATE_LIMITS=limits):
+        statuses = [
+            user_client.post(url, {'text': f'comment {i}'}).status_code
+            for i in range(3)
+        ]
+    assert statuses == [302, 302, 429]
+    assert post_with_published_location.comments.count() == 2
+
+
+def test_reads_are_not_throttled(user_client, post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    with override_settings(RATE_LIMITS={'blog:post_detail': '1/m'}):
+        statuses = {user_client.get(url).status_code for _ in range(3)}
+    assert statuses == {200}
+
+
+def test_rejected_writes_spend_neither_slots_nor_limits(settings, rf, user):
+    settings.RATE_LIMITS = {'blog:add_comment': {'ip': '2/m', 'user': '1/m'}}
+    settings.WRITE_CONCURRENCY_LIMIT = 1
+    middleware = RateLimitMiddleware(lambda request: HttpResponse())
+    request = rf.post('/posts/1/comment/')
+    request.user = user
+    request.resolver_match = resolve(request.path)
+
+    # A shed write does not count against the limits.
+    assert middleware.write_slots.acquire(blocking=False)
+    assert middleware.process_view(request, None, (), {}).status_code == 429
+    middleware.write_slots.release()
+    assert middleware.process_view(request, None, (), {}) is None
+    middleware.write_slots.release()
+
+    # A throttled write gives back its slot and the IP window's count.
+    assert middleware.process_view(request, None, (), {}).status_code == 429
+    assert middleware.write_slots.acquire(blocking=False)
+    middleware.write_slots.release()
+    other = rf.post('/posts/1/comment/')
+    other.user = AnonymousUser()
+    other.resolver_match = request.resolver_match
+    assert middleware.process_view(other, None, (), {}) is None
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import PostSignature, RelatedPost
+
+pytestmark = [pytest.mark.django_db]
+
+GARDEN = 'tomato cucumber pepper garden watering greenhouse seedlings soil'
+PICKLES = 'tomato cucumber pepper garden pickles jars brine vinegar'
+SPACE = 'rocket orbit satellite launch telescope galaxy planet station'
+
+
+def test_related_posts_are_indexed_incrementally(
+        mixer, user, client, published_category
+):
+    def blend(title, text):
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title=title, text=text,
+            pub_date=timezone.now() - timedelta(days=1),
+        )
+
+    tomatoes = blend('Tomatoes', GARDEN + ' tomatoes')
+    cucumbers = blend('Cucumbers', PICKLES)
+    rockets = blend('Rockets', SPACE)
+    blend('Short', 'a b c')
+
+    call_command('update_related_posts', '--batch-size', '2')
+    assert not PostSignature.objects.filter(signature__isnull=True)
+    response = client.get(f'/posts/{tomatoes.id}/')
+    assert list(response.context['related_posts']) == [cucumbers]
+    assert not RelatedPost.objects.filter(post=rockets)
+
+    peppers = blend('Peppers', GARDEN + ' tomatoes peppers')
+    assert PostSignature.objects.get(post=peppers).signature is None
+    call_command('update_related_posts')
+    assert list(client.get(
+        f'/posts/{tomatoes.id}/'
+    ).context['related_posts']) == [peppers, cucumbers]
+
+    peppers.is_published = False
+    peppers.save()
+    assert list(client.get(
+        f'/posts/{tomatoes.id}/'
+    ).context['related_posts']) == [cucumbers]
+
+    cucumbers.text = SPACE + ' cucumbers'
+    cucumbers.save()
+    call_command('update_related_posts')
+    assert list(client.get(
+        f'/posts/{cucumbers.id}/'
+    ).context['related_posts']) == [rockets]
+    assert not RelatedPost.objects.filter(post=tomatoes, related=cucumbers)
+
+
+def test_only_title_and_text_edits_reset_the_signature(
+        post_with_published_location
+):
+    post = post_with_published_location
+    call_command('update_related_posts')
+
+    post.is_published = False
+    post.pub_date -= timedelta(hours=1)
+    with CaptureQueriesContext(connection) as queries:
+        post.save()
+    assert PostSignature.objects.get(post=post).signature is not None
+    # The previous text is never read back to compare it.
+    assert not any(
+        query['sql'].startswith('SELECT') and '"text"' in query['sql']
+        for query in queries.captured_queries
+    )
+
+    post.text += '!'
+    post.save()
+    assert PostSignature.objects.get(post=post).signature is not None
+
+    post.title = 'Совершенно новый заголовок'
+    post.save()
+    assert PostSignature.objects.get(post=post).signature is None
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_sitemaps_are_sharded_and_rebuilt_incrementally(
+        settings, tmp_path, post_with_published_location,
+        unpublished_posts_with_published_locations
+):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITEMAP_SHARD_SIZE = 2
+    call_command('generate_sitemaps')
+
+    index = (tmp_path / 'sitemap.xml').read_text()
+    assert '/sitemaps/categories.xml' in index
+    post_id = post_with_published_location.id
+    shard = tmp_path / f'posts-{post_id // 2}.xml'
+    assert f'/posts/{post_id}/' in shard.read_text()
+    for post in unpublished_posts_with_published_locations:
+        assert f'/posts/{post.id}/<' not in index + shard.read_text()
+
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    assert (tmp_path / '.dirty').read_text() == f'{post_id // 2}\n'
+    call_command('generate_sitemaps', '--dirty')
+    assert not (tmp_path / '.dirty').exists()
+    assert not shard.exists()
+    assert shard.name not in (tmp_path / 'sitemap.xml').read_text()
+
+
+def test_category_toggles_and_due_posts_mark_post_shards(
+        settings, tmp_path, post_with_published_location
+):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITEMAP_SHARD_SIZE = 2
+    post = post_with_published_location
+    shard = tmp_path / f'posts-{post.id // 2}.xml'
+    call_command('generate_sitemaps')
+    assert shard.exists()
+
+    post.category.is_published = False
+    post.category.save()
+    call_command('generate_sitemaps', '--dirty')
+    assert not shard.exists()
+
+    post.category.is_published = True
+    post.category.save()
+    call_command('generate_sitemaps', '--dirty')
+    assert f'/posts/{post.id}/' in shard.read_text()
+
+    # A scheduled post becomes visible without being saved again.
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() + timedelta(days=1)
+    )
+    call_command('generate_sitemaps')
+    assert not shard.exists()
+    Post.objects.filter(pk=post.pk).update(pub_date=timezone.now())
+    call_command('generate_sitemaps', '--dirty')
+    assert f'/posts/{post.id}/' in shard.read_text()
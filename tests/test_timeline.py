@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Follow, TimelineEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def timeline_ids(client, cursor=None):
+    params = {'cursor': cursor} if cursor else {}
+    page_obj = client.get('/timeline/', params).context['page_obj']
+    return [post.id for post in page_obj], page_obj.next_cursor
+
+
+def test_new_posts_are_fanned_out_to_followers(
+        settings, mixer, user, user_client, another_user, published_category,
+        another_category
+):
+    settings.TIMELINE = {**settings.TIMELINE, 'FANOUT_LIMIT': 1}
+    now = timezone.now()
+    user_client.post(f'/profile/{another_user.username}/follow/')
+    user_client.post(f'/category/{published_category.slug}/follow/')
+    other = mixer.blend('blog.Category', is_published=True)
+
+    posts = [
+        mixer.blend(
+            'blog.Post', author=another_user, category=other,
+            pub_date=now - timedelta(hours=hour),
+        )
+        for hour in range(1, 13)
+    ]
+    scheduled = mixer.blend(
+        'blog.Post', author=another_user, category=other,
+        pub_date=now + timedelta(days=1),
+    )
+    hidden = mixer.blend(
+        'blog.Post', author=another_user, category=other,
+        pub_date=now, is_published=False,
+    )
+    # Two followers make the category popular: its posts are read at
+    # request time and not stored in timelines.
+    for follower in (user, another_user):
+        mixer.blend(
+            'blog.Follow', follower=follower, category=another_category
+        )
+    pulled = mixer.blend(
+        'blog.Post', author=mixer.blend('auth.User'),
+        category=another_category, pub_date=now - timedelta(minutes=30),
+    )
+    assert not TimelineEntry.objects.filter(post=pulled).exists()
+    assert TimelineEntry.objects.filter(post=scheduled, user=user).exists()
+    assert not TimelineEntry.objects.filter(post=hidden).exists()
+
+    first, cursor = timeline_ids(user_client)
+    expected = [pulled.id] + [post.id for post in posts]
+    assert first == expected[:10]
+    second, cursor = timeline_ids(user_client, cursor)
+    assert second == expected[10:]
+    assert cursor is None
+
+    posts[0].is_published = False
+    posts[0].save()
+    assert not TimelineEntry.objects.filter(post=posts[0]).exists()
+
+    user_client.post(f'/profile/{another_user.username}/unfollow/')
+    assert not Follow.objects.filter(author=another_user).exists()
+    assert not TimelineEntry.objects.filter(user=user).exists()
+    assert timeline_ids(user_client)[0] == [pulled.id]
+
+
+def test_follow_backfills_recent_posts(
+        settings, mixer, user_client, another_user, published_category
+):
+    settings.TIMELINE = {**settings.TIMELINE, 'BACKFILL': 2}
+    posts = mixer.cycle(3).blend(
+        'blog.Post', author=another_user, category=published_category,
+        pub_date=(
+            timezone.now() - timedelta(hours=hour) for hour in range(1, 4)
+        ),
+    )
+    user_client.post(f'/profile/{another_user.username}/follow/')
+    assert timeline_ids(user_client)[0] == [posts[0].id, posts[1].id]
+    assert another_user.post_stats.followers_count == 1
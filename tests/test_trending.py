@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import PostScore
+from blog.moderation import delete_comments
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_popular_feed_ranks_by_maintained_scores(
+        settings, client, mixer, user, published_category
+):
+    settings.TRENDING = {**settings.TRENDING, 'MIN_SCORE': 1.0}
+    posts = mixer.cycle(12).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    for rank, post in enumerate(posts):
+        mixer.cycle(rank + 1).blend('blog.Comment', post=post)
+    hidden = posts[-1]
+    hidden.is_published = False
+    hidden.save()
+
+    response = client.get('/popular/')
+    first_page = list(response.context['page_obj'])
+    assert [post.id for post in first_page] == [
+        post.id for post in reversed(posts[:-1])
+    ][:10]
+
+    next_cursor = response.context['page_obj'].next_cursor
+    second_page = list(client.get(
+        '/popular/', {'cursor': next_cursor}
+    ).context['page_obj'])
+    assert [post.id for post in second_page] == [posts[0].id]
+
+    delete_comments(posts[0].comments.all())
+    assert PostScore.objects.get(post=posts[0]).score == 0
+
+    call_command('decay_trending', '--elapsed', str(24 * 60 * 60))
+    assert PostScore.objects.get(post=posts[1]).score == 5.0
+    assert not PostScore.objects.filter(post=posts[0]).exists()
+
+
+def test_moderated_comments_leave_the_score(
+        mixer, user, another_user, published_category
+):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.cycle(3).blend('blog.Comment', post=post, author=another_user)
+    mixer.blend('blog.Comment', post=post, author=user)
+    assert PostScore.objects.get(post=post).score == 20.0
+
+    call_command(
+        'moderate', 'comments', 'unpublish', '--author', another_user.username
+    )
+    assert PostScore.objects.get(post=post).score == 5.0
+    call_command(
+        'moderate', 'comments', 'publish', '--author', another_user.username
+    )
+    assert PostScore.objects.get(post=post).score == 20.0
+    call_command(
+        'moderate', 'comments', 'delete', '--author', another_user.username
+    )
+    assert PostScore.objects.get(post=post).score == 5.0
@@ -0,0 +1,102 @@
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import view_counts
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_views_are_buffered_and_flushed_in_one_update(
+        settings, client, mixer, post_with_published_location
+):
+    settings.VIEW_COUNT_FLUSH_INTERVAL = 3600
+    post = post_with_published_location
+    other = mixer.blend(
+        'blog.Post', category=post.category, is_published=True,
+        pub_date=post.pub_date,
+    )
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(3):
+            client.get(f'/posts/{post.id}/')
+        client.get(f'/posts/{other.id}/')
+    assert not any(q['sql'].startswith('UPDATE') for q in queries)
+    assert 'Просмотры: 3' in client.get(f'/posts/{post.id}/').content.decode()
+
+    with CaptureQueriesContext(connection) as queries:
+        view_counts.flush(force=True)
+    assert len([
+        q for q in queries if q['sql'].startswith('UPDATE "blog_post"')
+    ]) == 1
+    assert Post.objects.get(pk=post.id).views_count == 4
+    assert Post.objects.get(pk=other.id).views_count == 1
+
+
+def test_editing_a_post_keeps_flushed_views(
+        user_client, admin_client, post_with_published_location
+):
+    post = post_with_published_location
+    data = {
+        'title': 'Edited',
+        'text': post.text,
+        'pub_date': post.pub_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'pub_date_0': post.pub_date.strftime('%Y-%m-%d'),
+        'pub_date_1': post.pub_date.strftime('%H:%M:%S'),
+        'category': post.category_id,
+        'author': post.author_id,
+        'content': 'Edited',
+        'is_published': 'on',
+    }
+    for client, url in (
+            (user_client, f'/posts/{post.id}/edit/'),
+            (admin_client, f'/admin/blog/post/{post.id}/change/'),
+    ):
+        Post.objects.filter(pk=post.pk).update(views_count=10)
+        with CaptureQueriesContext(connection) as queries:
+            assert client.post(url, data).status_code == 302
+        assert Post.objects.get(pk=post.pk).views_count == 10
+        assert not any(
+            'views_count' in query['sql']
+            for query in queries if query['sql'].startswith('UPDATE')
+        )
+
+
+def test_failed_flush_keeps_views_and_serves_the_page(
+        settings, client, monkeypatch, caplog, post_with_published_location
+):
+    settings.VIEW_COUNT_FLUSH_INTERVAL = 0
+    post = post_with_published_location
+
+    def fail(views):
+        raise DatabaseError('database is locked')
+
+    monkeypatch.setattr(view_counts, 'add_view_scores', fail)
+    response = client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+    assert view_counts.pending_views(post.id) == 1
+    assert 'Could not flush view counts' in caplog.text
+
+
+def test_prerendered_pages_count_views_with_a_beacon(
+        settings, tmp_path, client, post_with_published_location,
+        unpublished_posts_with_published_locations
+):
+    settings.PRERENDER_ROOT = tmp_path
+    settings.VIEW_COUNT_FLUSH_INTERVAL = 3600
+    post = post_with_published_location
+    call_command('prerender_pages')
+    content = (tmp_path / 'posts' / str(post.id) / 'index.html').read_text()
+    assert f'/posts/{post.id}/view/' in content
+    assert f'/posts/{post.id}/view/' not in client.get(
+        f'/posts/{post.id}/'
+    ).content.decode()
+    assert view_counts.pending_views(post.id) == 1
+
+    assert client.get(f'/posts/{post.id}/view/').status_code == 405
+    assert client.post(f'/posts/{post.id}/view/').status_code == 204
+    assert view_counts.pending_views(post.id) == 2
+    hidden = unpublished_posts_with_published_locations[0]
+    assert client.post(f'/posts/{hidden.id}/view/').status_code == 404
+    assert view_counts.pending_views(hidden.id) == 0
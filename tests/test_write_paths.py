@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.caching import published_category_ids
+from blog.models import Comment
+from blog.visibility import is_post_visible
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def hidden_posts(
+        future_posts, unpublished_posts_with_published_locations,
+        posts_with_unpublished_category
+):
+    return [
+        future_posts[0],
+        unpublished_posts_with_published_locations[0],
+        posts_with_unpublished_category[0],
+    ]
+
+
+def test_comments_on_hidden_posts_are_404_for_others(
+        user_client, another_user_client, hidden_posts
+):
+    for post in hidden_posts:
+        url = f'/posts/{post.id}/comment/'
+        response = another_user_client.post(url, {'text': 'Hidden'})
+        assert response.status_code == 404
+        assert not Comment.objects.filter(post=post).exists()
+        # The author still sees the post and may comment on it.
+        assert user_client.post(url, {'text': 'Own'}).status_code == 302
+        assert Comment.objects.filter(post=post).count() == 1
+
+
+def test_post_visibility_is_one_query(
+        django_assert_num_queries, user, another_user,
+        post_with_published_location, hidden_posts
+):
+    published_category_ids()
+    with django_assert_num_queries(1):
+        assert is_post_visible(post_with_published_location.id, another_user)
+    for post in hidden_posts:
+        with django_assert_num_queries(1):
+            assert not is_post_visible(post.id, another_user)
+        with django_assert_num_queries(1):
+            assert is_post_visible(post.id, user)
+
+
+def _post_queries(client, url, data):
+    with CaptureQueriesContext(connection) as context:
+        assert client.post(url, data).status_code == 302
+    return [query['sql'] for query in context.captured_queries]
+
+
+def test_comment_and_delete_do_not_load_posts(
+        mixer, user_client, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/comment/'
+    published_category_ids()
+    few = _post_queries(another_user_client, url, {'text': 'First'})
+    mixer.cycle(20).blend('blog.Comment', post=post)
+    many = _post_queries(another_user_client, url, {'text': 'Second'})
+    assert len(many) == len(few)
+
+    deleted = _post_queries(user_client, f'/posts/{post.id}/delete/', {})
+    for sql in few + many + deleted:
+        assert '"blog_post"."text"' not in sql